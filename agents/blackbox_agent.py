@@ -1,64 +1,98 @@
 import os
 import requests
-import io
-import contextlib
 import traceback
 from dotenv import load_dotenv
+from backend import http_client
+from backend.sse import iter_delta_content
+from agents.sandbox import run_sandboxed
+from backend.tracing import traced
 
 load_dotenv()
 BLACKBOX_API_KEY = os.getenv("BLACKBOX_API_KEY")
 
-if not BLACKBOX_API_KEY:
-    raise EnvironmentError("Missing BLACKBOX_API_KEY in environment variables.")
+BLACKBOX_API_URL = os.getenv("BLACKBOX_API_URL", "https://api.blackbox.ai/api/chat/completions")
+BLACKBOX_MODEL = "blackboxai/deepseek/deepseek-r1-distill-llama-8b"
+BLACKBOX_TEMPERATURE = 0.7
 
 
-def fetch_blackbox_code(prompt: str) -> str:
+def get_api_key() -> str:
     """
-    Fetches code suggestion from Blackbox.ai using the DeepSeek LLaMA-8B model.
-    Includes full error handling and JSON validation.
+    Returns the Blackbox key. Validated on first use rather than at import,
+    so the app can start (and warm up) before keys are configured.
     """
-    # CORRECTED API ENDPOINT
-    url = "https://api.blackbox.ai/api/chat/completions"
-    headers = {
+    key = BLACKBOX_API_KEY or os.getenv("BLACKBOX_API_KEY")
+    if not key:
+        raise EnvironmentError("Missing BLACKBOX_API_KEY in environment variables.")
+    return key
+
+
+def _headers(api_key: str) -> dict:
+    return {
         "Content-Type": "application/json",
-        "Authorization": f"Bearer {BLACKBOX_API_KEY}",
+        "Authorization": f"Bearer {api_key}",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
+
+
+def _payload(prompt: str, stream: bool = False) -> dict:
     payload = {
-        "model": "blackboxai/deepseek/deepseek-r1-distill-llama-8b",
+        "model": BLACKBOX_MODEL,
         "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7
+        "temperature": BLACKBOX_TEMPERATURE
     }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def stream_blackbox_code(prompt: str):
+    """
+    Streams a code suggestion from Blackbox.ai, yielding content chunks as they arrive.
+    Falls back to the complete JSON body when the endpoint ignores `stream`.
+    Errors are yielded as a single message starting with ❌ or ⚠️.
+    """
+    try:
+        api_key = get_api_key()
+    except EnvironmentError as e:
+        yield f"❌ {e}"
+        return
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
-        
-        # Detect HTML responses
-        if response.text.strip().startswith("<!DOCTYPE html>"):
-            return "❌ Received HTML response. Verify API endpoint is correct."
-            
-        response.raise_for_status()
-        
-        try:
-            data = response.json()
-            choices = data.get("choices", [])
+        with http_client.post(BLACKBOX_API_URL, headers=_headers(api_key), json=_payload(prompt, stream=True),
+                              stream=True, timeout=15) as response:
+            response.raise_for_status()
+
+            if "text/event-stream" in response.headers.get("Content-Type", ""):
+                yield from iter_delta_content(response.iter_content(chunk_size=None))
+                return
+
+            text = response.text
+            if text.strip().startswith("<!DOCTYPE html>"):
+                yield "❌ Received HTML response. Verify API endpoint is correct."
+                return
+            try:
+                choices = response.json().get("choices", [])
+            except ValueError:
+                yield f"❌ Invalid JSON from API (status {response.status_code}):\n{text[:200]}"
+                return
             if not choices:
-                return "⚠️ No choices returned from Blackbox."
-            return choices[0].get("message", {}).get("content", "").strip()
-        except ValueError:
-            return f"❌ Invalid JSON from API (status {response.status_code}):\n{response.text[:200]}"
+                yield "⚠️ No choices returned from Blackbox."
+                return
+            yield choices[0].get("message", {}).get("content", "").strip()
 
     except requests.HTTPError as http_err:
-        return f"❌ HTTP error occurred: {http_err}\nResponse: {response.text[:200]}"
+        yield f"❌ HTTP error occurred: {http_err}"
     except requests.RequestException as req_err:
-        return f"❌ Request failed: {str(req_err)}"
+        yield f"❌ Request failed: {str(req_err)}"
     except Exception as e:
-        return f"❌ Unexpected error: {str(e)}"
+        yield f"❌ Unexpected error: {str(e)}"
 
 
+@traced("blackbox.execute")
 def safe_execute(code: str) -> str:
     """
     Executes basic Python code safely with restricted built-ins.
+    Runs in a pre-warmed sandbox worker process with a wall-clock timeout and CPU/memory limits.
     Skips execution if code contains error symbols or messages.
     Returns stdout output or error message.
     """
@@ -66,27 +100,12 @@ def safe_execute(code: str) -> str:
     if not code or any(err in code for err in ["❌", "⚠️", "Blackbox API Error"]):
         return "⚠️ Cannot execute: This is not valid Python code."
 
-    allowed_builtins = {
-        "print": print,
-        "len": len,
-        "range": range,
-        "str": str,
-        "int": int,
-        "float": float,
-        "bool": bool,
-        "list": list,
-        "dict": dict,
-        "enumerate": enumerate,
-        "zip": zip,
-        "type": type
-    }
-    safe_globals = {"__builtins__": allowed_builtins}
-    output = io.StringIO()
+    result = run_sandboxed(code)
+    if not result.get("ok"):
+        return f"⚠️ Execution Error:\n{result.get('error', 'Unknown error')}"
 
-    try:
-        with contextlib.redirect_stdout(output):
-            exec(code, safe_globals)
-    except Exception as e:
-        return f"⚠️ Execution Error:\n{str(e)}"
+    output = result.get("output", "").strip()
+    if result.get("truncated"):
+        output += "\n... [Output Truncated] ..."
 
-    return output.getvalue().strip() or "✅ Code executed without output."
+    return output or "✅ Code executed without output."
@@ -0,0 +1,214 @@
+# agents/fetch_engine.py
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from backend import http_client
+
+# Configurable Limits
+FETCH_BUDGET_SECONDS = float(os.getenv("RESEARCH_FETCH_BUDGET", "12"))  # Overall deadline for one research query
+MAX_FETCH_WORKERS = int(os.getenv("RESEARCH_FETCH_WORKERS", "8"))       # Pages fetched at the same time
+MAX_PER_HOST = int(os.getenv("RESEARCH_FETCH_PER_HOST", "2"))          # Politeness limit per upstream host
+HEDGE_DELAY_SECONDS = float(os.getenv("RESEARCH_HEDGE_DELAY", "1.0"))   # Start a backup candidate after this long without progress
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def _host_semaphore(url: str, per_host: int) -> threading.BoundedSemaphore:
+    """
+    Returns the shared semaphore limiting concurrent fetches to the URL's host.
+    """
+    host = urlsplit(url).netloc.lower()
+    key = (host, per_host)
+    with _host_slots_lock:
+        if key not in _host_slots:
+            _host_slots[key] = threading.BoundedSemaphore(per_host)
+        return _host_slots[key]
+
+
+TIMED_OUT = object()  # Value yielded by fetch_as_completed for sources that missed the deadline
+DISCARDED = object()  # Value yielded by fetch_first_k for candidates that failed, were unusable or were abandoned
+
+
+def _slotted(fetch_fn, deadline: float, per_host: int):
+    """
+    Wraps fetch_fn so each call first takes a slot for its host, giving up at the deadline.
+    Requests made by fetch_fn are cut off at the deadline too, so a straggler
+    can't hold its host's slot past it.
+    """
+    def run(url):
+        slot = _host_semaphore(url, per_host)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not slot.acquire(timeout=remaining):
+            raise TimeoutError(f"No fetch slot for {url} before the deadline.")
+        try:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Got a fetch slot for {url} only after the deadline.")
+            with http_client.deadline(deadline):
+                return fetch_fn(url)
+        finally:
+            slot.release()
+    return run
+
+
+def fetch_as_completed(urls: list, fetch_fn, budget: float = None, per_host: int = None,
+                       max_workers: int = None):
+    """
+    Runs fetch_fn(url) for every URL in parallel within an overall latency budget
+    and yields (url, value) pairs as each fetch finishes.
+
+    Requests to the same host are capped at `per_host` at a time. Once the budget
+    is spent, pending work is cancelled and running stragglers are dropped; each of
+    those is yielded last as (url, TIMED_OUT), in the original rank order.
+    """
+    budget = FETCH_BUDGET_SECONDS if budget is None else budget
+    per_host = per_host or MAX_PER_HOST
+    max_workers = max_workers or MAX_FETCH_WORKERS
+    if not urls:
+        return
+
+    deadline = time.monotonic() + budget
+    run = _slotted(fetch_fn, deadline, per_host)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)), thread_name_prefix="research-fetch")
+    # Copy the caller's context so trace spans opened in workers join the caller's trace
+    futures = {
+        executor.submit(contextvars.copy_context().run, run, url): rank
+        for rank, url in enumerate(urls)
+    }
+    timed_out = []
+
+    try:
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=futures.get):
+                rank = futures[future]
+                try:
+                    value = future.result()
+                except TimeoutError:
+                    timed_out.append(rank)
+                    continue
+                except Exception as e:
+                    value = f"❌ Error fetching content: {e}"
+                yield urls[rank], value
+
+        for future in pending:
+            future.cancel()
+            timed_out.append(futures[future])
+    finally:
+        # Never block the caller on stragglers; their own request timeouts clean them up
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if timed_out:
+        skipped = [urls[rank] for rank in sorted(timed_out)]
+        print(f"[Research Fetch Timeout] {len(skipped)} source(s) missed the {budget:.1f}s budget: {skipped}")
+        for url in skipped:
+            yield url, TIMED_OUT
+
+
+def fetch_concurrently(urls: list, fetch_fn, budget: float = None, per_host: int = None,
+                       max_workers: int = None) -> tuple:
+    """
+    Runs fetch_fn(url) for every URL in parallel within an overall latency budget.
+
+    Returns:
+        tuple: (results, timed_out) where results holds (url, value) pairs for the
+        fetches that finished, in the original rank order, and timed_out lists the
+        URLs that missed the deadline.
+    """
+    finished = {}
+    timed_out = []
+    for url, value in fetch_as_completed(urls, fetch_fn, budget, per_host, max_workers):
+        if value is TIMED_OUT:
+            timed_out.append(url)
+        else:
+            finished[url] = value
+
+    results = [(url, finished[url]) for url in urls if url in finished]
+    return results, timed_out
+
+
+def fetch_first_k(candidates: list, fetch_fn, k: int, usable=bool, hedge_delay: float = None,
+                  budget: float = None, per_host: int = None, max_workers: int = None):
+    """
+    Hedged fetching over ranked candidate URLs: yields (url, value) for the first k
+    fetches whose value passes usable(value), as they arrive.
+
+    The top k candidates start at once. Whenever a fetch fails or comes back
+    unusable, the next candidate replaces it immediately; whenever hedge_delay
+    passes without a usable result, one more candidate starts as a backup for the
+    slow ones. As soon as k usable values are in, the remaining work is abandoned.
+    If the budget runs out first, fetches still running are yielded as (url, TIMED_OUT).
+
+    Every started candidate ends in exactly one yield: candidates that failed or came
+    back unusable, and those abandoned once k values were in, are yielded as
+    (url, DISCARDED).
+    """
+    budget = FETCH_BUDGET_SECONDS if budget is None else budget
+    hedge_delay = HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
+    per_host = per_host or MAX_PER_HOST
+    max_workers = max_workers or MAX_FETCH_WORKERS
+    if not candidates or k <= 0:
+        return
+
+    now = time.monotonic()
+    deadline = now + budget
+    run = _slotted(fetch_fn, deadline, per_host)
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(candidates)), thread_name_prefix="research-hedge")
+    futures = {}  # future -> candidate rank
+    pending = set()
+    next_rank = 0
+
+    def launch():
+        nonlocal next_rank
+        if next_rank < len(candidates):
+            future = executor.submit(contextvars.copy_context().run, run, candidates[next_rank])
+            futures[future] = next_rank
+            pending.add(future)
+            next_rank += 1
+
+    for _ in range(k):
+        launch()
+
+    found = 0
+    next_hedge = now + hedge_delay
+    try:
+        while pending and found < k:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= next_hedge:
+                launch()
+                next_hedge = now + hedge_delay
+            done, _ = wait(pending, timeout=min(deadline, next_hedge) - now, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=futures.get):
+                pending.discard(future)
+                url = candidates[futures[future]]
+                try:
+                    value = future.result()
+                except Exception as e:
+                    print(f"[Research Hedge] {url} failed: {e}")
+                    value = None
+                if value is not None and usable(value) and found < k:
+                    found += 1
+                    next_hedge = time.monotonic() + hedge_delay
+                    yield url, value
+                    continue
+                yield url, DISCARDED
+                if found < k:
+                    launch()  # Replace the dud with the next candidate
+    finally:
+        # Abandon the rest; their own request timeouts clean them up
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    leftover = TIMED_OUT if found < k else DISCARDED
+    for rank in sorted(futures[future] for future in pending):
+        yield candidates[rank], leftover
@@ -0,0 +1,261 @@
+# agents/page_cache.py
+#
+# Persistent cache for deep research: the cleaned article text of fetched pages,
+# zlib-compressed in SQLite and kept by the pages' own HTTP caching headers, plus
+# short-lived DuckDuckGo result lists. A repeated query is answered from disk.
+
+import email.utils
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configurable Limits
+CACHE_DB_PATH = os.getenv("RESEARCH_PAGE_CACHE_DB", ".cache/pages.sqlite3")             # Empty disables the cache
+CACHE_MAX_BYTES = int(os.getenv("RESEARCH_PAGE_CACHE_BYTES", str(256 * 1024 * 1024)))  # Compressed text quota
+DEFAULT_TTL = float(os.getenv("RESEARCH_PAGE_DEFAULT_TTL", "3600"))                    # Pages without caching headers
+MAX_TTL = float(os.getenv("RESEARCH_PAGE_MAX_TTL", str(7 * 86400)))                    # Cap on max-age / Expires
+SEARCH_TTL = float(os.getenv("RESEARCH_SEARCH_CACHE_TTL", "600"))                      # DuckDuckGo result lists
+COMPRESS_LEVEL = 6
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+_db = None
+_disk_bytes = 0
+_lock = threading.Lock()
+
+
+def _connect():
+    """
+    Opens the shared SQLite connection on first use. Callers must hold _lock.
+    """
+    global _db, _disk_bytes
+    if _db is None and CACHE_DB_PATH:
+        directory = os.path.dirname(CACHE_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, body BLOB, size INTEGER, etag TEXT, last_modified TEXT, "
+            "expires_at REAL, accessed_at REAL)"
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        _db.execute("CREATE TABLE IF NOT EXISTS searches (key TEXT PRIMARY KEY, links TEXT, expires_at REAL)")
+        _db.commit()
+        _disk_bytes = _db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+    return _db
+
+
+def freshness(headers, now: float = None):
+    """
+    Seconds a response may be served from cache under its Cache-Control / Expires
+    headers, DEFAULT_TTL when it has neither, or None if it must not be stored.
+    `no-cache` responses are stored but revalidated on every use.
+    """
+    now = time.time() if now is None else now
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return min(float(match.group(1)), MAX_TTL)
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return min(max(email.utils.parsedate_to_datetime(expires).timestamp() - now, 0.0), MAX_TTL)
+        except (TypeError, ValueError):
+            return 0.0  # Invalid Expires means already expired
+    return DEFAULT_TTL
+
+
+def get(url: str):
+    """
+    Looks up a page's cached text.
+
+    Returns:
+        dict or None: {"text", "fresh", "etag", "last_modified"}; stale entries are
+        returned too so the caller can revalidate them with a conditional request.
+    """
+    now = time.time()
+    with _lock:
+        try:
+            db = _connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT body, etag, last_modified, expires_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[Page Cache Error] {e}")
+            return None
+
+    body, etag, last_modified, expires_at = row
+    return {
+        "text": zlib.decompress(body).decode("utf-8"),
+        "fresh": expires_at > now,
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+
+
+def put(url: str, text: str, headers) -> None:
+    """
+    Stores a page's cleaned text under the freshness its response headers allow,
+    then evicts least recently used pages beyond CACHE_MAX_BYTES.
+    """
+    global _disk_bytes
+    ttl = freshness(headers)
+    can_revalidate = headers.get("ETag") or headers.get("Last-Modified")
+    if ttl is None or (ttl <= 0 and not can_revalidate):
+        return
+
+    body = zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+    if len(body) > CACHE_MAX_BYTES:
+        return
+    now = time.time()
+    with _lock:
+        try:
+            db = _connect()
+            if db is None:
+                return
+            old = db.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO pages (url, body, size, etag, last_modified, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, len(body), headers.get("ETag"), headers.get("Last-Modified"), now + ttl, now),
+            )
+            _disk_bytes += len(body) - (old[0] if old else 0)
+            if _disk_bytes > CACHE_MAX_BYTES:
+                _evict(db)
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[Page Cache Error] {e}")
+
+
+def refresh(url: str, headers) -> None:
+    """
+    Extends a stale entry after a 304 Not Modified, using the new response's headers.
+    """
+    ttl = freshness(headers)
+    now = time.time()
+    with _lock:
+        try:
+            db = _connect()
+            if db is None:
+                return
+            if ttl is None:
+                db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            else:
+                db.execute(
+                    "UPDATE pages SET expires_at = ?, accessed_at = ?, "
+                    "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (now + ttl, now, headers.get("ETag"), headers.get("Last-Modified"), url),
+                )
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[Page Cache Error] {e}")
+
+
+def _evict(db) -> None:
+    """
+    Deletes least recently used pages until the cache is back under 90% of its quota.
+    Callers must hold _lock.
+    """
+    global _disk_bytes
+    target = CACHE_MAX_BYTES * 0.9
+    victims = []
+    for url, size in db.execute("SELECT url, size FROM pages ORDER BY accessed_at"):
+        if _disk_bytes <= target:
+            break
+        victims.append((url,))
+        _disk_bytes -= size
+    db.executemany("DELETE FROM pages WHERE url = ?", victims)
+
+
+def _search_key(query: str, limit: int) -> str:
+    return f"{' '.join(query.split()).casefold()}|{limit}"
+
+
+def get_search(query: str, limit: int):
+    """
+    Returns a cached DuckDuckGo result list for the query, or None.
+    """
+    with _lock:
+        try:
+            db = _connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT links FROM searches WHERE key = ? AND expires_at > ?", (_search_key(query, limit), time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"[Page Cache Error] {e}")
+            return None
+    return json.loads(row[0]) if row else None
+
+
+def put_search(query: str, limit: int, links: list) -> None:
+    """
+    Caches a successful result list for SEARCH_TTL seconds.
+    """
+    if SEARCH_TTL <= 0 or not links:
+        return
+    now = time.time()
+    with _lock:
+        try:
+            db = _connect()
+            if db is None:
+                return
+            db.execute("DELETE FROM searches WHERE expires_at <= ?", (now,))
+            db.execute(
+                "INSERT OR REPLACE INTO searches (key, links, expires_at) VALUES (?, ?, ?)",
+                (_search_key(query, limit), json.dumps(links), now + SEARCH_TTL),
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[Page Cache Error] {e}")
+
+
+def get_stats() -> dict:
+    with _lock:
+        try:
+            db = _connect()
+            if db is None:
+                return {"pages": 0, "bytes": 0, "max_bytes": CACHE_MAX_BYTES}
+            pages = db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        except sqlite3.Error:
+            pages = 0
+        return {"pages": pages, "bytes": _disk_bytes, "max_bytes": CACHE_MAX_BYTES}
+
+
+def clear() -> None:
+    """
+    Empties the page and search caches.
+    """
+    global _disk_bytes
+    with _lock:
+        try:
+            db = _connect()
+            if db is not None:
+                db.execute("DELETE FROM pages")
+                db.execute("DELETE FROM searches")
+                db.commit()
+                _disk_bytes = 0
+        except sqlite3.Error as e:
+            print(f"[Page Cache Error] {e}")
@@ -1,39 +1,169 @@
 # agents/research_agent.py
 
+import functools
+import os
 import requests
-from bs4 import BeautifulSoup
 import re
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 from backend.summarizer import summarize_text
+from backend import http_client
+from backend.tracing import traced
+from agents import page_cache
+from agents.fetch_engine import fetch_as_completed, fetch_first_k, DISCARDED, TIMED_OUT
 
+SEARCH_URL = os.getenv("DUCKDUCKGO_URL", "https://html.duckduckgo.com/html/")
+
+# Configurable Limits
+RESEARCH_MODE = os.getenv("RESEARCH_MODE", "hedged")                  # "hedged" or "all" (fetch exactly the top results)
+RESEARCH_SOURCES = int(os.getenv("RESEARCH_SOURCES", "3"))            # Usable pages kept per query
+OVERFETCH_FACTOR = int(os.getenv("RESEARCH_OVERFETCH", "3"))          # Candidates searched per kept page in hedged mode
+MIN_USABLE_CHARS = int(os.getenv("RESEARCH_MIN_TEXT_CHARS", "200"))   # Less article text than this counts as a dead page
+MAX_PAGE_BYTES = int(os.getenv("RESEARCH_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))  # HTML beyond this is not parsed
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=None)
+def _html_parser() -> str:
+    """
+    lxml when installed (several times faster), otherwise the standard library parser.
+    """
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+def normalize_url(href: str):
+    """
+    Turns a search result link into a canonical page URL, or None if it is not one.
+    Unwraps DuckDuckGo redirect links (/l/?uddg=...), drops ad links, fragments and
+    tracking parameters, and lower-cases the scheme and host.
+    """
+    if not href:
+        return None
+    if href.startswith("//"):
+        href = "https:" + href
+    parts = urlsplit(href)
+    if parts.netloc.endswith("duckduckgo.com"):
+        if parts.path.startswith("/l/"):
+            target = parse_qs(parts.query).get("uddg", [None])[0]
+            return normalize_url(target) if target else None
+        return None  # Ads (/y.js) and other DuckDuckGo-internal links
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+
+    host = parts.netloc.lower()
+    if (parts.scheme == "http" and host.endswith(":80")) or (parts.scheme == "https" and host.endswith(":443")):
+        host = host.rsplit(":", 1)[0]
+    query = [
+        (name, value) for name, value in parse_qs(parts.query, keep_blank_values=True).items()
+        if not name.lower().startswith(TRACKING_PARAMS)
+    ]
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/", urlencode(query, doseq=True), ""))
+
+
+def _dedupe_key(url: str) -> str:
+    # http/https, "www." and a trailing slash rarely point at different pages
+    parts = urlsplit(url)
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+
+@traced("research.search")
 def search_web(query: str, max_results: int = 3) -> list:
     """
     Performs a web search using DuckDuckGo HTML (safe & public) and scrapes the top results.
+    Links are unwrapped from DuckDuckGo redirects, normalized and deduplicated.
+    Result lists are cached for a short time, so repeated queries skip the search.
     """
+    from bs4 import BeautifulSoup, SoupStrainer  # Deferred: bs4 is only needed once research is used
+
+    cached = page_cache.get_search(query, max_results)
+    if cached is not None:
+        return cached
+
     results = []
     try:
-        url = f"https://html.duckduckgo.com/html/?q={requests.utils.quote(query)}"
+        url = f"{SEARCH_URL}?q={requests.utils.quote(query)}"
         headers = {"User-Agent": "Mozilla/5.0"}
-        res = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(res.text, "html.parser")
+        res = http_client.get(url, headers=headers, timeout=10)
+        # Only result anchors become nodes; the rest of the page is skipped by the parser
+        soup = BeautifulSoup(res.content, _html_parser(), parse_only=SoupStrainer("a", class_="result__a"))
 
-        for a in soup.select("a.result__a", limit=max_results):
-            link = a["href"]
+        seen = set()
+        for a in soup.find_all("a"):
+            link = normalize_url(a.get("href"))
+            if not link or _dedupe_key(link) in seen:
+                continue
+            seen.add(_dedupe_key(link))
             results.append(link)
+            if len(results) >= max_results:
+                break
     except Exception as e:
-        results.append(f"❌ Web search error: {e}")
+        return [f"❌ Web search error: {e}"]
 
+    page_cache.put_search(query, max_results, results)
     return results
 
+
+def extract_paragraph_text(html: bytes, encoding: str = None) -> str:
+    """
+    Collects the text of every <p> in a page. A SoupStrainer keeps the parser from
+    building any other node, which is most of the document.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, _html_parser(), parse_only=SoupStrainer("p"), from_encoding=encoding)
+    return WHITESPACE.sub(" ", " ".join(p.get_text() for p in soup.find_all("p"))).strip()
+
+
+def fetch_article_text(url: str) -> str:
+    """
+    Returns a page's cleaned paragraph text, from the page cache when its HTTP
+    caching headers allow. Stale entries are revalidated with a conditional request,
+    so an unchanged page costs a 304 and no parsing.
+    Raises for network errors; returns an error message for unusable responses.
+    """
+    key = normalize_url(url) or url
+    cached = page_cache.get(key)
+    if cached and cached["fresh"]:
+        return cached["text"]
+
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    res = http_client.get(url, headers=headers, timeout=10)
+    if res.status_code == 304 and cached:
+        page_cache.refresh(key, res.headers)
+        return cached["text"]
+    if res.status_code >= 400:
+        return f"❌ Error fetching content: HTTP {res.status_code}"
+    content_type = res.headers.get("Content-Type", "text/html")
+    if "html" not in content_type and "xml" not in content_type:
+        return f"⚠️ Unsupported content type: {content_type.split(';')[0]}"
+
+    cleaned = extract_paragraph_text(res.content[:MAX_PAGE_BYTES], res.encoding)
+    page_cache.put(key, cleaned, res.headers)
+    return cleaned
+
+
+@traced("research.fetch")
 def fetch_and_summarize(url: str) -> str:
     """
     Fetches article text from a URL and summarizes it.
     """
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        res = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(res.text, "html.parser")
-        text = ' '.join([p.text for p in soup.find_all('p')])
-        cleaned = re.sub(r"\s+", " ", text.strip())
+        cleaned = fetch_article_text(url)
+        if cleaned.startswith(("❌", "⚠️")):
+            return cleaned
 
         if len(cleaned) > 200:
             return summarize_text(cleaned)
@@ -42,17 +172,93 @@ def fetch_and_summarize(url: str) -> str:
     except Exception as e:
         return f"❌ Error fetching content: {e}"
 
-def deep_research_answer(prompt: str) -> str:
+
+def is_usable(summary: str) -> bool:
     """
-    High-level wrapper: search + fetch + summarize + return sources.
+    True for a summary with real article text rather than an error or a stub page.
+    """
+    return len(summary) >= MIN_USABLE_CHARS and not summary.startswith(("❌", "⚠️"))
+
+
+def format_answer(results: list, timed_out: list) -> str:
+    """
+    Builds the final research answer from (url, summary) pairs in rank order.
     """
-    links = search_web(prompt)
+    if not results:
+        return "⚠️ No sources responded in time.\n" + "\n".join([f"⏱️ {link}" for link in timed_out])
+
+    combined = "\n\n---\n\n".join([summary for _, summary in results])
+    citations = "\n".join([f"🔗 {link}" for link, _ in results])
+    answer = f"**Summary of Findings:**\n\n{combined}\n\n**Sources:**\n{citations}"
+
+    if timed_out:
+        skipped = "\n".join([f"⏱️ {link}" for link in timed_out])
+        answer += f"\n\n**Timed Out:**\n{skipped}"
+
+    return answer
+
+
+def iter_research(prompt: str, budget: float = None, mode: str = None):
+    """
+    Incremental deep research. Yields (kind, url, text) tuples:
+    - ("source", url, None) for each page being fetched, before its summary
+    - ("summary", url, summary) as soon as that page has been fetched and summarized
+    - ("timeout", url, None) for sources that missed the latency budget
+    - ("replaced", url, None) for announced sources dropped in favour of other candidates
+    - ("answer", None, answer) once, last, with the same text deep_research_answer returns
+
+    In "hedged" mode (the default) the search over-fetches candidates and the first
+    RESEARCH_SOURCES pages with usable text win; dead or slow pages are replaced by
+    the next candidates. In "all" mode exactly the top results are fetched.
+    """
+    mode = mode or RESEARCH_MODE
+    hedged = mode == "hedged"
+    links = search_web(prompt, RESEARCH_SOURCES * OVERFETCH_FACTOR if hedged else RESEARCH_SOURCES)
     if not links:
-        return "⚠️ No results found."
+        yield "answer", None, "⚠️ No results found."
+        return
+    if links[0].startswith("❌"):
+        yield "answer", None, links[0]
+        return
+
+    if hedged:
+        fetches = fetch_first_k(links, fetch_and_summarize, RESEARCH_SOURCES, usable=is_usable, budget=budget)
+        announced = set(links[:RESEARCH_SOURCES])  # Started right away; backups are announced when they deliver
+    else:
+        fetches = fetch_as_completed(links, fetch_and_summarize, budget=budget)
+        announced = set(links)
+    for link in links:
+        if link in announced:
+            yield "source", link, None
+
+    finished = {}
+    timed_out = []
+    for link, summary in fetches:
+        if summary is DISCARDED:
+            if link in announced:
+                yield "replaced", link, None  # Backups that were never announced drop out silently
+            continue
+        if summary is TIMED_OUT:
+            timed_out.append(link)
+            yield "timeout", link, None
+            continue
+        if link not in announced:
+            yield "source", link, None
+        finished[link] = summary
+        yield "summary", link, summary
 
-    summaries = [fetch_and_summarize(link) for link in links]
+    results = [(link, finished[link]) for link in links if link in finished]
+    yield "answer", None, format_answer(results, timed_out)
 
-    combined = "\n\n---\n\n".join(summaries)
-    citations = "\n".join([f"🔗 {link}" for link in links])
 
-    return f"**Summary of Findings:**\n\n{combined}\n\n**Sources:**\n{citations}"
+@traced("research.answer")
+def deep_research_answer(prompt: str, budget: float = None) -> str:
+    """
+    High-level wrapper: search + fetch + summarize + return sources.
+    Pages are fetched concurrently; sources that miss the latency budget are dropped and listed.
+    """
+    answer = None
+    for kind, _, text in iter_research(prompt, budget):
+        if kind == "answer":
+            answer = text
+    return answer
@@ -0,0 +1,159 @@
+# agents/sandbox.py
+
+import atexit
+import json
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configurable Limits
+POOL_SIZE = int(os.getenv("SANDBOX_WORKERS", "2"))                # Pre-warmed worker processes
+WALL_TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", "5"))           # Seconds before a run is killed
+CPU_SECONDS = float(os.getenv("SANDBOX_CPU_SECONDS", "3"))        # CPU time per run (RLIMIT_CPU)
+MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "256"))            # Address space per worker (RLIMIT_AS)
+MAX_OUTPUT_CHARS = int(os.getenv("SANDBOX_MAX_OUTPUT", "10000"))  # Captured stdout per run
+MAX_RUNS_PER_WORKER = int(os.getenv("SANDBOX_MAX_RUNS", "100"))   # Recycle workers after this many runs
+ACQUIRE_TIMEOUT = 10                                              # Seconds to wait for an idle worker
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+
+class SandboxWorker:
+    """
+    One isolated Python child process speaking JSON lines over its pipes.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", WORKER_PATH, str(MEMORY_MB), str(MAX_OUTPUT_CHARS)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={"PATH": os.defpath},  # Keeps API keys in our environment out of the child
+            text=True,
+            encoding="utf-8",
+        )
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, code: str, timeout: float) -> dict:
+        """
+        Sends one snippet and waits up to `timeout` seconds for its result.
+        """
+        self.runs += 1
+        self.proc.stdin.write(json.dumps({"code": code, "cpu_seconds": CPU_SECONDS}) + "\n")
+        self.proc.stdin.flush()
+
+        ready, _, _ = select.select([self.proc.stdout], [], [], timeout)
+        if not ready:
+            return {"ok": False, "error": f"Timed out after {timeout:g}s.", "recycle": True}
+
+        line = self.proc.stdout.readline()
+        if not line:
+            return {"ok": False, "error": "CPU or memory limit exceeded.", "recycle": True}
+        return json.loads(line)
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
+
+class SandboxPool:
+    """
+    Fixed-size pool of pre-warmed workers. Workers that time out, crash, hit a
+    resource limit or reach MAX_RUNS_PER_WORKER are killed and replaced in the
+    background, so the next request still finds a warm process.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._idle = queue.Queue()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def warm(self) -> None:
+        """
+        Starts the workers ahead of the first request.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._replenish()
+
+    def _replenish(self) -> None:
+        try:
+            worker = SandboxWorker()
+        except OSError as e:
+            print(f"[Sandbox Error] Could not start worker: {e}")
+            return
+        with self._lock:
+            self._all.add(worker)
+        self._idle.put(worker)
+
+    def _retire(self, worker: SandboxWorker) -> None:
+        with self._lock:
+            self._all.discard(worker)
+        worker.kill()
+        threading.Thread(target=self._replenish, daemon=True).start()
+
+    def run(self, code: str, timeout: float = WALL_TIMEOUT) -> dict:
+        self.warm()
+        try:
+            worker = self._idle.get(timeout=ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            return {"ok": False, "error": "Sandbox is busy, try again shortly."}
+
+        if not worker.alive():
+            self._retire(worker)
+            return self.run(code, timeout)
+
+        try:
+            result = worker.run(code, timeout)
+        except (OSError, ValueError) as e:
+            result = {"ok": False, "error": f"Sandbox worker failed: {e}", "recycle": True}
+
+        if result.get("recycle") or worker.runs >= MAX_RUNS_PER_WORKER:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.kill()
+
+
+_pool = SandboxPool()
+atexit.register(_pool.shutdown)
+
+
+def warm_sandbox() -> None:
+    """
+    Pre-starts the shared pool so the first execution doesn't pay process startup.
+    """
+    _pool.warm()
+
+
+def run_sandboxed(code: str, timeout: float = WALL_TIMEOUT) -> dict:
+    """
+    Runs a snippet in the shared worker pool.
+
+    Returns:
+        dict: {"ok": bool, "output": str, "truncated": bool, "error": str (on failure)}
+    """
+    return _pool.run(code, timeout)
@@ -0,0 +1,123 @@
+# agents/sandbox_worker.py
+#
+# Long-lived child process started by agents/sandbox.py. Reads one JSON request per
+# line on stdin, runs the snippet with restricted built-ins and writes one JSON
+# result per line on a private copy of stdout. Standard library only, so workers
+# start fast and carry nothing from the Streamlit server.
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits are then enforced by the wall clock only
+    resource = None
+
+ALLOWED_BUILTINS = {
+    "print": print,
+    "len": len,
+    "range": range,
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+    "enumerate": enumerate,
+    "zip": zip,
+    "type": type
+}
+
+
+class BoundedWriter(io.TextIOBase):
+    """
+    Captures printed output up to a character limit and silently drops the rest.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        room = self.limit - self.size
+        if room > 0:
+            kept = text[:room]
+            self.parts.append(kept)
+            self.size += len(kept)
+        if len(text) > max(room, 0):
+            self.truncated = True
+        return len(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+
+def _limit_memory(memory_mb: int) -> None:
+    if resource and memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _limit_cpu(seconds: float) -> None:
+    """
+    RLIMIT_CPU counts the worker's whole lifetime, so each run gets `seconds` on top of what is used.
+    Going over raises SIGXCPU, which ends the worker and makes the pool recycle it.
+    """
+    if not resource or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_snippet(code: str, cpu_seconds: float, output_limit: int) -> dict:
+    buffer = BoundedWriter(output_limit)
+    safe_globals = {"__builtins__": dict(ALLOWED_BUILTINS)}
+    _limit_cpu(cpu_seconds)
+
+    try:
+        with contextlib.redirect_stdout(buffer):
+            exec(code, safe_globals)
+    except MemoryError:
+        return {"ok": False, "error": "Memory limit exceeded.", "output": buffer.getvalue(),
+                "truncated": buffer.truncated, "recycle": True}
+    except Exception as e:
+        return {"ok": False, "error": str(e), "output": buffer.getvalue(), "truncated": buffer.truncated}
+
+    return {"ok": True, "output": buffer.getvalue(), "truncated": buffer.truncated}
+
+
+def main() -> None:
+    memory_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    output_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    # Keep the protocol channel private; anything else written to fd 1 goes nowhere
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    _limit_memory(memory_mb)
+
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+            result = run_snippet(request["code"], request.get("cpu_seconds", 0), output_limit)
+        except Exception as e:
+            result = {"ok": False, "error": f"Bad sandbox request: {e}", "recycle": True}
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
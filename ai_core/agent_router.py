@@ -1,29 +1,282 @@
 # ai_core/agent_router.py
 
-from agents.blackbox_agent import fetch_blackbox_code, safe_execute
-from ai_core.llama_agent import ask_ai_stream
-from agents.research_agent import deep_research_answer
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ai_core import response_cache
+from ai_core.events import AgentEvent, TOKEN, SOURCE, PARTIAL, ERROR, DONE
+from backend.memory_manager import add_to_history, get_conversation_history, DEFAULT_SESSION
+from backend.tracing import span, traced_stream
 
+# Configurable Limits
+BACKGROUND_WORKERS = int(os.getenv("ROUTER_BACKGROUND_WORKERS", "8"))  # Agents running alongside a Groq stream
+STREAM_WORKERS = int(os.getenv("ROUTER_STREAM_WORKERS", "32"))          # Agent streams open at once for the async API
 
-def route_message(agent: str, prompt: str):
+_background = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="agent-router")
+_streams = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="agent-stream")
+_END = object()
+
+
+def _is_cacheable(result: str) -> bool:
+    """
+    Errors, warnings and research answers with timed-out sources are never cached.
+    """
+    return bool(result) and not result.startswith(("❌", "⚠️", "[Groq API Error")) and "⏱️" not in result
+
+
+def _cached_groq_stream(prompt: str, bypass_cache: bool, session_id: str, model_prompt: str = None):
+    """
+    Serves a Groq answer from the response cache as a replayed stream, or streams it
+    live and caches the full reply once the stream completes.
+    The key covers the conversation context the answer was generated from.
+    """
+    from ai_core.llama_agent import ask_ai_stream, GROQ_MODEL  # Agents load on first use
+
+    key = response_cache.make_key(
+        "groq", model_prompt or prompt, GROQ_MODEL, {"history": get_conversation_history(session_id)}
+    )
+
+    if not bypass_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            add_to_history("user", prompt, session_id)  # Keep memory identical to a live ask_ai_stream call
+            yield from response_cache.replay_stream(cached)
+            return
+
+    chunks = []
+    for chunk in ask_ai_stream(prompt, session_id, model_prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    reply = "".join(chunks)
+    if _is_cacheable(reply):
+        response_cache.put("groq", key, reply)
+
+
+def route_message(agent: str, prompt: str, bypass_cache: bool = False, session_id: str = DEFAULT_SESSION,
+                  model_prompt: str = None):
     """
     Routes the user input to the correct AI service:
     - 'groq' streams LLaMA3 response (Groq API)
     - 'blackbox' gets code suggestion (Blackbox.ai)
     - 'blackbox_exec' executes provided code
     - 'deepresearch' performs web search, article fetch, summarization
+
+    Repeated prompts are answered from the response cache; pass bypass_cache=True to force a fresh call.
+    Groq keeps conversation context per session_id. model_prompt, when given, is sent
+    instead of the prompt but only the prompt is remembered in that context.
+    For incremental results from every agent use iter_events, or stream_events from async code.
     """
     if agent == "groq":
-        return ask_ai_stream(prompt)
+        return traced_stream("groq.stream", _cached_groq_stream(prompt, bypass_cache, session_id, model_prompt))
 
-    if agent == "blackbox":
-        result = fetch_blackbox_code(prompt)
-        return result or "⚠️ No suggestion returned from Blackbox."
+    with span("route", agent=agent):
+        return _route_blocking(agent, model_prompt or prompt, bypass_cache)
+
+
+def _route_blocking(agent: str, prompt: str, bypass_cache: bool):
+    """
+    Handles the agents that return a complete string: the DONE text of their event stream.
+    """
+    for event in _guarded(agent, _agent_events(agent, prompt, bypass_cache, DEFAULT_SESSION)):
+        if event.type == DONE:
+            return event.text
+
+
+def _groq_events(prompt: str, bypass_cache: bool, session_id: str):
+    chunks = []
+    for chunk in _cached_groq_stream(prompt, bypass_cache, session_id):
+        if chunk.startswith("[Groq API Error"):
+            yield AgentEvent(ERROR, "groq", chunk)
+        else:
+            yield AgentEvent(TOKEN, "groq", chunk)
+        chunks.append(chunk)
+    yield AgentEvent(DONE, "groq", "".join(chunks))
+
+
+def _blackbox_events(prompt: str, bypass_cache: bool):
+    from agents.blackbox_agent import stream_blackbox_code, BLACKBOX_MODEL, BLACKBOX_TEMPERATURE
+
+    key = response_cache.make_key("blackbox", prompt, BLACKBOX_MODEL, {"temperature": BLACKBOX_TEMPERATURE})
+    cached = None if bypass_cache else response_cache.get(key)
+    if cached is not None:
+        for chunk in response_cache.replay_stream(cached):
+            yield AgentEvent(TOKEN, "blackbox", chunk)
+        yield AgentEvent(DONE, "blackbox", cached)
+        return
+
+    chunks = []
+    for chunk in stream_blackbox_code(prompt):
+        if not chunks and chunk.startswith(("❌", "⚠️")):
+            # Failures arrive as the only chunk
+            yield AgentEvent(ERROR, "blackbox", chunk)
+            yield AgentEvent(DONE, "blackbox", chunk)
+            return
+        chunks.append(chunk)
+        yield AgentEvent(TOKEN, "blackbox", chunk)
+
+    result = "".join(chunks).strip()
+    if not result:
+        result = "⚠️ No suggestion returned from Blackbox."
+        yield AgentEvent(ERROR, "blackbox", result)
+    elif _is_cacheable(result):
+        response_cache.put("blackbox", key, result)
+    yield AgentEvent(DONE, "blackbox", result)
+
+
+def _research_events(prompt: str, bypass_cache: bool):
+    from agents.research_agent import iter_research
+
+    key = response_cache.make_key("deepresearch", prompt)
+    cached = None if bypass_cache else response_cache.get(key)
+    if cached is not None:
+        yield AgentEvent(DONE, "deepresearch", cached)
+        return
+
+    for kind, url, text in iter_research(prompt):
+        if kind == "source":
+            yield AgentEvent(SOURCE, "deepresearch", url=url)
+        elif kind == "summary":
+            event_type = ERROR if text.startswith("❌") else PARTIAL
+            yield AgentEvent(event_type, "deepresearch", text, url)
+        elif kind == "timeout":
+            yield AgentEvent(ERROR, "deepresearch", "⏱️ Source missed the research time budget.", url)
+        elif kind == "replaced":
+            yield AgentEvent(ERROR, "deepresearch", "↪️ Source failed or was too slow; replaced by another result.", url)
+        else:
+            if text.startswith(("❌", "⚠️")):
+                yield AgentEvent(ERROR, "deepresearch", text)
+            elif _is_cacheable(text):
+                response_cache.put("deepresearch", key, text)
+            yield AgentEvent(DONE, "deepresearch", text)
+
+
+def _exec_events(code: str):
+    from agents.blackbox_agent import safe_execute
+
+    output = safe_execute(code)
+    if output.startswith("⚠️"):
+        yield AgentEvent(ERROR, "blackbox_exec", output)
+    yield AgentEvent(DONE, "blackbox_exec", output)
 
-    if agent == "blackbox_exec":
-        return safe_execute(prompt)
 
+def _agent_events(agent: str, prompt: str, bypass_cache: bool, session_id: str):
+    """
+    The event stream of one agent. Agent modules load on first use.
+    """
+    if agent == "groq":
+        return _groq_events(prompt, bypass_cache, session_id)
+    if agent == "blackbox":
+        return _blackbox_events(prompt, bypass_cache)
+    if agent == "blackbox_exec":
+        return _exec_events(prompt)
     if agent == "deepresearch":
-        return deep_research_answer(prompt)
+        return _research_events(prompt, bypass_cache)
+    message = "❌ Unknown agent specified."
+    return iter([AgentEvent(ERROR, agent, message), AgentEvent(DONE, agent, message)])
+
+
+def iter_events(agent: str, prompt: str, bypass_cache: bool = False, session_id: str = DEFAULT_SESSION):
+    """
+    Synchronous event stream for any agent: TOKEN events for Groq and Blackbox text,
+    SOURCE and PARTIAL events as deep research finds and summarizes pages, ERROR events
+    for failures, and a final DONE event carrying the complete result.
+
+    As with route_message, the Groq stream records the user turn in the session's
+    history and the caller records the assistant reply.
+    """
+    return _guarded(agent, traced_stream(f"{agent}.events", _agent_events(agent, prompt, bypass_cache, session_id)))
+
+
+def _guarded(agent: str, events):
+    """
+    Passes events through, turning an exception raised before DONE into ERROR and DONE events.
+    """
+    done = False
+    try:
+        for event in events:
+            done = event.type == DONE
+            yield event
+    except Exception as e:
+        if done:
+            raise
+        message = f"❌ Unexpected error: {str(e)}"
+        yield AgentEvent(ERROR, agent, message)
+        yield AgentEvent(DONE, agent, message)
+
+
+async def _events_from_threads(*event_streams):
+    """
+    Runs each synchronous event stream on the stream pool and merges their events
+    into one async generator as they arrive. Closing the generator early stops the
+    producers at their next event.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            stopped.set()  # The consumer's loop is gone
+
+    def produce(events):
+        try:
+            for event in events:
+                put(event)
+                if stopped.is_set():
+                    break
+        finally:
+            events.close()
+            put(_END)
+
+    for events in event_streams:
+        _streams.submit(contextvars.copy_context().run, produce, events)
+
+    remaining = len(event_streams)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _END:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        stopped.set()
+
+
+def stream_events(agent: str, prompt: str, bypass_cache: bool = False, session_id: str = DEFAULT_SESSION):
+    """
+    Async version of iter_events: `async for event in stream_events("deepresearch", q): ...`
+    The agent runs on a worker thread, so the event loop is never blocked by its I/O.
+    """
+    return _events_from_threads(iter_events(agent, prompt, bypass_cache, session_id))
 
-    return "❌ Unknown agent specified."
+
+def stream_concurrent(prompt: str, agents=("groq", "blackbox"), bypass_cache: bool = False,
+                      session_id: str = DEFAULT_SESSION):
+    """
+    Runs several agents on the same prompt at once and merges their events into one
+    async stream in arrival order; use event.agent to tell them apart. Each agent
+    contributes its own DONE event.
+    """
+    return _events_from_threads(*[iter_events(agent, prompt, bypass_cache, session_id) for agent in agents])
+
+
+def route_concurrent(prompt: str, bypass_cache: bool = False, session_id: str = DEFAULT_SESSION,
+                     model_prompt: str = None):
+    """
+    Dispatches the Groq stream and the Blackbox code suggestion at the same time.
+    Blackbox starts immediately in the background while the caller consumes the stream,
+    so total latency is the slower of the two rather than their sum.
+
+    Returns:
+        tuple: (groq_stream, blackbox_future) where blackbox_future.result() is the suggestion.
+    """
+    blackbox_future = _background.submit(
+        contextvars.copy_context().run, route_message, "blackbox", model_prompt or prompt, bypass_cache
+    )
+    return route_message("groq", prompt, bypass_cache, session_id, model_prompt), blackbox_future
@@ -0,0 +1,35 @@
+# ai_core/events.py
+#
+# Typed events shared by every agent stream (see agent_router.iter_events / stream_events).
+
+TOKEN = "token"      # text: the next chunk of the answer
+SOURCE = "source"    # url: a source was found and is being fetched
+PARTIAL = "partial"  # url, text: an intermediate result, e.g. one source's summary
+ERROR = "error"      # text: what went wrong; url when it concerns a single source
+DONE = "done"        # text: the complete result, always the last event of a stream
+
+EVENT_TYPES = (TOKEN, SOURCE, PARTIAL, ERROR, DONE)
+
+
+class AgentEvent:
+    """
+    One event in an agent's stream. Every stream ends with exactly one DONE event
+    whose text is what route_message would have returned.
+    """
+
+    __slots__ = ("type", "agent", "text", "url")
+
+    def __init__(self, type: str, agent: str, text: str = "", url: str = None):
+        self.type = type
+        self.agent = agent
+        self.text = text
+        self.url = url
+
+    def to_dict(self) -> dict:
+        record = {"type": self.type, "agent": self.agent, "text": self.text}
+        if self.url:
+            record["url"] = self.url
+        return record
+
+    def __repr__(self):
+        return f"AgentEvent({self.type!r}, {self.agent!r}, text={self.text[:40]!r}, url={self.url!r})"
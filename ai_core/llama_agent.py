@@ -2,53 +2,63 @@
 
 import os
 import requests
-import json
 from dotenv import load_dotenv
-from backend.memory_manager import conversation_history, add_to_history
+from backend.memory_manager import get_conversation_history, add_to_history, DEFAULT_SESSION
+from backend import http_client
+from backend.sse import iter_delta_content
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-if not GROQ_API_KEY:
-    raise ValueError("Missing GROQ_API_KEY in your environment variables.")
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = "llama3-8b-8192"
 
 
-def ask_ai_stream(prompt: str):
+def get_api_key() -> str:
+    """
+    Returns the Groq key. Validated on first use rather than at import.
+    """
+    key = GROQ_API_KEY or os.getenv("GROQ_API_KEY")
+    if not key:
+        raise ValueError("Missing GROQ_API_KEY in your environment variables.")
+    return key
+
+
+def ask_ai_stream(prompt: str, session_id: str = DEFAULT_SESSION, model_prompt: str = None):
     """
     Streams LLaMA3 responses via Groq API. Yields content chunks in real time.
-    Adds conversation to memory for context retention.
+    Adds conversation to the session's memory for context retention.
+
+    model_prompt, when given, replaces the prompt in this request only (e.g. the
+    prompt with retrieved document excerpts); the history keeps the plain prompt.
     """
-    url = url = "https://api.groq.com/openai/v1/chat/completions"
+    url = GROQ_API_URL
+
+    try:
+        headers = {"Authorization": f"Bearer {get_api_key()}"}
+    except ValueError as e:
+        yield f"[Groq API Error: {str(e)}]"
+        return
 
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
+    add_to_history("user", prompt, session_id)
 
-    add_to_history("user", prompt)
+    messages = get_conversation_history(session_id)
+    if model_prompt:
+        if messages[-1] == {"role": "user", "content": prompt}:
+            messages = messages[:-1]  # Unless the turn was too long to be kept
+        messages = messages + [{"role": "user", "content": model_prompt}]
 
     payload = {
-        "model": "llama3-8b-8192",
-        "messages": conversation_history,
+        "model": GROQ_MODEL,
+        "messages": messages,
         "stream": True
     }
 
     try:
-        with requests.post(url, headers=headers, json=payload, stream=True, timeout=30) as response:
+        with http_client.post(url, headers=headers, json=payload, stream=True, timeout=30) as response:
             response.raise_for_status()
 
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                line = line.decode("utf-8")
-                if line.startswith("data: "):
-                    try:
-                        data = json.loads(line[6:])
-                        content = (
-                            data.get("choices", [{}])[0]
-                            .get("delta", {})
-                            .get("content", "")
-                        )
-                        if content:
-                            yield content
-                    except json.JSONDecodeError:
-                        continue
+            # Parse SSE straight from the raw byte stream as it arrives
+            yield from iter_delta_content(response.iter_content(chunk_size=None))
     except requests.RequestException as e:
         yield f"[Groq API Error: {str(e)}]"
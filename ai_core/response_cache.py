@@ -0,0 +1,180 @@
+# ai_core/response_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configurable Limits
+CACHE_DB_PATH = os.getenv("RESPONSE_CACHE_DB", ".cache/responses.sqlite3")      # Empty disables the SQLite tier
+MEMORY_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "512"))     # In-memory LRU tier
+DB_MAX_ROWS = int(os.getenv("RESPONSE_CACHE_DB_ROWS", "20000"))                 # SQLite tier, least recently used go first
+PRUNE_EVERY = 100                                                               # Writes between SQLite prunes
+REPLAY_CHUNK_CHARS = 24                                                         # Chunk size when replaying as a stream
+
+# Seconds a cached answer stays valid per agent; 0 disables caching for that agent
+AGENT_TTLS = {
+    "groq": float(os.getenv("RESPONSE_CACHE_TTL_GROQ", "3600")),
+    "blackbox": float(os.getenv("RESPONSE_CACHE_TTL_BLACKBOX", "86400")),
+    "deepresearch": float(os.getenv("RESPONSE_CACHE_TTL_DEEPRESEARCH", "21600")),
+}
+
+_memory = OrderedDict()  # key -> (value, expires_at)
+_lock = threading.Lock()
+_db = None
+_writes = 0
+
+
+CASE_INSENSITIVE_AGENTS = frozenset({"deepresearch"})  # Web search queries ignore case; code and chat don't
+
+
+def normalize_prompt(prompt: str, agent: str = None) -> str:
+    """
+    Normalizes a prompt so trivially different ones share an entry. Research queries
+    have whitespace and case collapsed. Other prompts only lose the whitespace around
+    them: case and inner whitespace (identifiers, indentation) can change the answer.
+    """
+    if agent in CASE_INSENSITIVE_AGENTS:
+        return " ".join(prompt.split()).casefold()
+    return "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+
+
+def make_key(agent: str, prompt: str, model: str = None, params: dict = None) -> str:
+    """
+    Hashes the agent, normalized prompt, model and request parameters into a cache key.
+    """
+    payload = json.dumps(
+        {"agent": agent, "prompt": normalize_prompt(prompt, agent), "model": model, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect():
+    """
+    Opens the shared SQLite connection on first use. Callers must hold _lock.
+    """
+    global _db
+    if _db is None and CACHE_DB_PATH:
+        directory = os.path.dirname(CACHE_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, agent TEXT, value TEXT, expires_at REAL, accessed_at REAL)"
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        _db.commit()
+    return _db
+
+
+def _remember(key: str, value: str, expires_at: float) -> None:
+    _memory[key] = (value, expires_at)
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def get(key: str):
+    """
+    Returns the cached response for the key, checking memory then SQLite, or None.
+    """
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry:
+            value, expires_at = entry
+            if expires_at > now:
+                _memory.move_to_end(key)
+                return value
+            del _memory[key]
+
+        try:
+            db = _connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[Response Cache Error] {e}")
+            return None
+
+        _remember(key, row[0], row[1])
+        return row[0]
+
+
+def put(agent: str, key: str, value: str) -> None:
+    """
+    Stores a response under the agent's TTL in both tiers.
+    """
+    global _writes
+    ttl = AGENT_TTLS.get(agent, 0)
+    if ttl <= 0 or not value:
+        return
+
+    now = time.time()
+    with _lock:
+        _remember(key, value, now + ttl)
+        try:
+            db = _connect()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, agent, value, now + ttl, now),
+            )
+            _writes += 1
+            if _writes % PRUNE_EVERY == 0:
+                _prune(db, now)
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[Response Cache Error] {e}")
+
+
+def _prune(db, now: float) -> None:
+    """
+    Drops expired rows, then the least recently used rows beyond DB_MAX_ROWS.
+    """
+    db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+    db.execute(
+        "DELETE FROM responses WHERE key IN ("
+        "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+        (DB_MAX_ROWS,),
+    )
+
+
+def replay_stream(text: str, chunk_chars: int = REPLAY_CHUNK_CHARS):
+    """
+    Yields a cached answer in small chunks so it renders like a live stream.
+    """
+    for start in range(0, len(text), chunk_chars):
+        yield text[start:start + chunk_chars]
+
+
+def clear() -> None:
+    """
+    Empties both tiers.
+    """
+    with _lock:
+        _memory.clear()
+        try:
+            db = _connect()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"[Response Cache Error] {e}")
@@ -1,5 +1,9 @@
 import streamlit as st
 from frontend.chat_ui import render_chat_ui
+from backend.warmup import start_background_warmup
+
+# Load heavy libraries, the tokenizer and sandbox workers off the request path (once per process)
+start_background_warmup()
 
 st.set_page_config(
     page_title="Unified AI Chat Agent",
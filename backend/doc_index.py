@@ -0,0 +1,217 @@
+# backend/doc_index.py
+#
+# BM25 retrieval over uploaded documents. Extracted text is split into
+# token-sized chunks and indexed incrementally as it streams in; each chat
+# prompt then carries only the top-k chunks relevant to it.
+
+import heapq
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from dotenv import load_dotenv
+from backend.summarizer import CHARS_PER_TOKEN_GUESS, split_into_chunks
+
+load_dotenv()
+
+# Configurable Limits
+CHUNK_TOKENS = int(os.getenv("DOC_INDEX_CHUNK_TOKENS", "300"))                            # Approximate tokens per indexed chunk
+TOP_K = int(os.getenv("DOC_INDEX_TOP_K", "4"))                                            # Chunks added to each prompt
+CACHE_MAX_CHARS = int(os.getenv("DOC_INDEX_CACHE_CHARS", str(64 * 1024 * 1024)))         # Indexed text kept across uploads
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_VERSION = "1"  # Bump when chunking or tokenization changes
+
+_TERM = re.compile(r"\w\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def terms(text: str) -> list:
+    """
+    Lower-cased word terms of at least two characters, minus common stopwords.
+    """
+    return [term for term in _TERM.findall(text.lower()) if term not in STOPWORDS]
+
+
+class DocumentIndex:
+    """
+    Array-backed BM25 inverted index over the chunks of one document.
+
+    Each term owns two parallel arrays: the ids of the chunks containing it, in
+    increasing order, and its frequency in each. Chunk lengths live in one more
+    array, so the index costs a few bytes per posting rather than a Python object.
+    """
+
+    def __init__(self, chunk_tokens: int = CHUNK_TOKENS):
+        self.chunk_tokens = chunk_tokens
+        self.chunks = []
+        self._vocab = {}             # term -> term id
+        self._doc_ids = []           # term id -> array of chunk ids
+        self._freqs = []             # term id -> array of term frequencies
+        self._lengths = array("I")   # chunk id -> number of terms
+        self._total_length = 0
+        self.text_chars = 0
+        self._pending = []           # Streamed text not yet cut into chunks
+        self._pending_chars = 0
+        self.finished = False
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def add_chunk(self, chunk: str) -> None:
+        """
+        Indexes one chunk as the next document in the index.
+        """
+        chunk_id = len(self.chunks)
+        self.chunks.append(chunk)
+        self.text_chars += len(chunk)
+        counts = Counter(terms(chunk))
+        for term, count in counts.items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._doc_ids)
+                self._doc_ids.append(array("I"))
+                self._freqs.append(array("I"))
+            self._doc_ids[term_id].append(chunk_id)
+            self._freqs[term_id].append(count)
+        length = sum(counts.values())
+        self._lengths.append(length)
+        self._total_length += length
+
+    def add_text(self, text: str) -> None:
+        """
+        Feeds streamed text. Complete chunks are indexed right away; the last,
+        possibly unfinished one waits for more text or finish().
+        """
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars < 2 * self.chunk_tokens * CHARS_PER_TOKEN_GUESS:
+            return
+        pieces = split_into_chunks("".join(self._pending), self.chunk_tokens)
+        for piece in pieces[:-1]:
+            self.add_chunk(piece)
+        self._pending = pieces[-1:]
+        self._pending_chars = sum(len(piece) for piece in self._pending)
+
+    def finish(self) -> "DocumentIndex":
+        """
+        Indexes whatever streamed text is left. Returns the index for chaining.
+        """
+        for piece in split_into_chunks("".join(self._pending), self.chunk_tokens):
+            self.add_chunk(piece)
+        self._pending = []
+        self._pending_chars = 0
+        self.finished = True
+        return self
+
+    def index_stream(self, chunks):
+        """
+        Passes a chunk generator through unchanged while indexing it, so one
+        extraction pass can feed both summarization and the index.
+        """
+        for chunk in chunks:
+            self.add_text(chunk)
+            yield chunk
+        self.finish()
+
+    def search(self, query: str, k: int = TOP_K) -> list:
+        """
+        Ranks chunks against the query with BM25.
+
+        Returns:
+            list: Up to k (score, chunk_id) pairs, best first.
+        """
+        count = len(self.chunks)
+        if not count:
+            return []
+        average_length = self._total_length / count or 1.0
+        norm = BM25_K1 * (1 - BM25_B)
+        scale = BM25_K1 * BM25_B / average_length
+        lengths = self._lengths
+
+        scores = {}
+        for term in set(terms(query)):
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                continue
+            doc_ids = self._doc_ids[term_id]
+            df = len(doc_ids)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            weight = idf * (BM25_K1 + 1)
+            for chunk_id, tf in zip(doc_ids, self._freqs[term_id]):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + weight * tf / (tf + norm + scale * lengths[chunk_id])
+
+        return [(score, chunk_id) for chunk_id, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+    def top_chunks(self, query: str, k: int = TOP_K) -> list:
+        """
+        The k most relevant chunks, in document order so the excerpts read naturally.
+        """
+        return [self.chunks[chunk_id] for _, chunk_id in sorted(self.search(query, k), key=lambda hit: hit[1])]
+
+
+def build_prompt(prompt: str, index: DocumentIndex, k: int = TOP_K) -> str:
+    """
+    Prefixes the prompt with the document excerpts most relevant to it.
+    Returns the prompt unchanged when nothing in the document matches.
+    """
+    excerpts = index.top_chunks(prompt, k) if index else []
+    if not excerpts:
+        return prompt
+    context = "\n\n".join(f"[{i}] {excerpt}" for i, excerpt in enumerate(excerpts, 1))
+    return (
+        f"Relevant excerpts from the uploaded document:\n\n{context}\n\n"
+        f"Answer using the excerpts where they apply.\n\nQuestion: {prompt}"
+    )
+
+
+# Indexes per file hash, least recently used first
+_cache = OrderedDict()
+_cache_chars = 0
+_cache_lock = threading.Lock()
+
+
+def cache_key(digest: str, chunk_tokens: int = CHUNK_TOKENS) -> str:
+    return f"{digest}-{chunk_tokens}-v{INDEX_VERSION}"
+
+
+def get_cached(key: str):
+    """
+    Returns the finished index for the key, or None.
+    """
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+        return index
+
+
+def put_cached(key: str, index: DocumentIndex) -> None:
+    """
+    Keeps a finished index, evicting least recently used ones past CACHE_MAX_CHARS of text.
+    """
+    global _cache_chars
+    if not index.finished:
+        return
+    size = index.text_chars
+    with _cache_lock:
+        if key in _cache:
+            _cache_chars -= _cache.pop(key).text_chars
+        if size > CACHE_MAX_CHARS:
+            return
+        _cache[key] = index
+        _cache_chars += size
+        while _cache_chars > CACHE_MAX_CHARS:
+            _, evicted = _cache.popitem(last=False)
+            _cache_chars -= evicted.text_chars
+
+
+def clear_cache() -> None:
+    global _cache_chars
+    with _cache_lock:
+        _cache.clear()
+        _cache_chars = 0
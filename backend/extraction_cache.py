@@ -0,0 +1,166 @@
+# backend/extraction_cache.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configurable Limits
+MEMORY_CACHE_MAX_CHARS = int(os.getenv("EXTRACTION_CACHE_MEMORY_CHARS", str(32 * 1024 * 1024)))  # In-memory LRU bound
+DISK_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "")                                            # Empty disables the disk tier
+DISK_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))      # Disk tier quota
+
+_memory = OrderedDict()  # key -> extracted text, oldest first
+_memory_chars = 0
+_disk_bytes = None       # Running size of the disk tier; None until the first put scans it
+_lock = threading.Lock()
+_disk_lock = threading.Lock()
+
+
+def make_key(data: bytes, kind: str, version: str) -> str:
+    """
+    Builds a cache key from the file content hash, the extractor used and its version.
+    """
+    return key_for_digest(hashlib.sha256(data).hexdigest(), kind, version)
+
+
+def key_for_digest(digest: str, kind: str, version: str) -> str:
+    """
+    Same key as make_key, from a SHA-256 hex digest computed while streaming the content.
+    """
+    tag = hashlib.sha256(f"{kind}|{version}".encode("utf-8")).hexdigest()[:12]
+    return f"{digest}-{tag}"
+
+
+def _disk_path(key: str) -> str:
+    return os.path.join(DISK_CACHE_DIR, key[:2], f"{key}.txt")
+
+
+def _remember(key: str, text: str) -> None:
+    """
+    Stores text in the in-memory LRU tier, evicting least recently used entries.
+    """
+    global _memory_chars
+    with _lock:
+        if key in _memory:
+            _memory_chars -= len(_memory.pop(key))
+        if len(text) > MEMORY_CACHE_MAX_CHARS:
+            return
+        _memory[key] = text
+        _memory_chars += len(text)
+        while _memory_chars > MEMORY_CACHE_MAX_CHARS:
+            _, evicted = _memory.popitem(last=False)
+            _memory_chars -= len(evicted)
+
+
+def get(key: str):
+    """
+    Returns cached text for the key from memory, then disk, or None on a miss.
+    """
+    with _lock:
+        text = _memory.get(key)
+        if text is not None:
+            _memory.move_to_end(key)
+            return text
+
+    if not DISK_CACHE_DIR:
+        return None
+
+    path = _disk_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        os.utime(path)  # mtime doubles as the disk tier's LRU clock
+    except OSError:
+        return None
+
+    _remember(key, text)
+    return text
+
+
+def put(key: str, text: str) -> None:
+    """
+    Caches extracted text in memory and, when configured, on disk.
+    """
+    _remember(key, text)
+
+    if not DISK_CACHE_DIR:
+        return
+
+    global _disk_bytes
+    path = _disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with _disk_lock:
+            if _disk_bytes is None:
+                _disk_bytes = _scan_disk()[1]
+            else:
+                _disk_bytes += size - replaced
+            if _disk_bytes > DISK_CACHE_MAX_BYTES:
+                _evict_disk()
+    except OSError as e:
+        print(f"[Extraction Cache Error] {e}")
+
+
+def _scan_disk() -> tuple:
+    """
+    Walks the disk tier. Returns ([(mtime, size, path)], total bytes).
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(DISK_CACHE_DIR):
+        for name in files:
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    return entries, total
+
+
+def _evict_disk() -> None:
+    """
+    Deletes least recently used files until the disk tier is back under 90% of its
+    quota. Only runs once the running total passes the quota, so puts don't walk
+    the directory; the walk also corrects the total for other processes' writes.
+    Caller holds _disk_lock.
+    """
+    global _disk_bytes
+    entries, total = _scan_disk()
+    target = DISK_CACHE_MAX_BYTES * 0.9
+    if total > DISK_CACHE_MAX_BYTES:
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= target:
+                break
+    _disk_bytes = total
+
+
+def clear() -> None:
+    """
+    Empties the in-memory tier. The disk tier is left to its own eviction.
+    """
+    global _memory_chars
+    with _lock:
+        _memory.clear()
+        _memory_chars = 0
@@ -1,10 +1,47 @@
+import contextvars
 import os
-import requests
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from dotenv import load_dotenv
+from backend import http_client
+from backend.rate_limit import TokenBucket
+from backend.single_flight import SingleFlight
 
 load_dotenv()
 
 DEFAULT_USERNAME = "octocat"
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# Configurable Limits
+CACHE_TTL_SECONDS = float(os.getenv("GITHUB_CACHE_TTL", "300"))    # Serve without asking GitHub for this long
+CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "256"))  # Bounded across all sessions
+RATE_PER_SECOND = float(os.getenv("GITHUB_RATE_PER_SECOND", "1"))     # Until GitHub's headers say otherwise
+RATE_BURST = float(os.getenv("GITHUB_RATE_BURST", "10"))              # Requests allowed back to back
+THROTTLE_WAIT_SECONDS = float(os.getenv("GITHUB_THROTTLE_WAIT", "2"))  # Max wait for a token when nothing stale can be served
+PAGE_WORKERS = int(os.getenv("GITHUB_PAGE_WORKERS", "4"))            # Later pages fetched at once, across all sessions
+MAX_PAGES = int(os.getenv("GITHUB_MAX_PAGES", "10"))                 # Pages read per list
+PER_PAGE = 100                                                       # GitHub's maximum page size
+
+# Shared by every Streamlit session in this process: url -> cached response entry
+_response_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0, "coalesced": 0, "stale": 0, "throttled": 0}
+
+# Concurrent lookups of the same URL share one upstream call
+_flights = SingleFlight()
+
+_page_pool = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix="github-pages")
+_LINK = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+
+# GitHub meters the search API separately from everything else ("core")
+_buckets = {
+    "core": TokenBucket(RATE_PER_SECOND, RATE_BURST),
+    "search": TokenBucket(RATE_PER_SECOND, RATE_BURST),
+}
 
 def get_headers():
     """
@@ -17,30 +54,249 @@ def get_headers():
     return headers
 
 
+def _store_entry(url: str, entry: dict) -> None:
+    """
+    Inserts a cache entry as most recently used, evicting the oldest beyond the size bound.
+    """
+    with _cache_lock:
+        _response_cache[url] = entry
+        _response_cache.move_to_end(url)
+        while len(_response_cache) > CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+            _cache_stats["evictions"] += 1
+
+
+def _bucket_for(url: str) -> TokenBucket:
+    return _buckets["search"] if "/search/" in url else _buckets["core"]
+
+
+def _count(stat: str) -> None:
+    with _cache_lock:
+        _cache_stats[stat] += 1
+
+
+def _observe_rate_limit(url: str, resp) -> None:
+    """
+    Feeds GitHub's rate-limit headers into the matching token bucket.
+    """
+    bucket = _buckets.get(resp.headers.get("X-RateLimit-Resource", ""), _bucket_for(url))
+    remaining = resp.headers.get("X-RateLimit-Remaining")
+    reset = resp.headers.get("X-RateLimit-Reset")
+    try:
+        if remaining is not None and reset is not None:
+            bucket.sync(int(remaining), float(reset) - time.time())
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after is not None and resp.status_code in (403, 429):
+            bucket.pause(float(retry_after))
+    except ValueError:
+        pass
+
+
+def _cached_get(url: str):
+    """
+    GETs a GitHub API URL through the shared TTL cache.
+
+    Fresh entries are returned without a request. Stale entries are revalidated with
+    If-None-Match/If-Modified-Since, so an unchanged resource costs a 304 that GitHub
+    does not count against the rate limit.
+
+    Concurrent calls for the same URL share one request. Requests are paced by a
+    token bucket kept in step with GitHub's X-RateLimit-* and Retry-After headers;
+    while throttled or rate limited, the stale entry is served if there is one.
+
+    Returns:
+        The decoded JSON body, or None if the request failed.
+    """
+    entry = _cached_entry(url)
+    return entry["data"] if entry else None
+
+
+def _cached_entry(url: str):
+    """
+    Like _cached_get, but returns the whole cache entry (data plus response
+    headers such as Link), or None if the request failed.
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _response_cache.get(url)
+        if entry and now - entry["fetched_at"] < CACHE_TTL_SECONDS:
+            _response_cache.move_to_end(url)
+            _cache_stats["hits"] += 1
+            return entry
+
+    fetched, shared = _flights.do(url, _fetch, url, entry)
+    if shared:
+        _count("coalesced")
+    return fetched
+
+
+def _fetch(url: str, entry: dict):
+    """
+    One upstream request for _cached_get, run by a single caller per URL at a time.
+    """
+    bucket = _bucket_for(url)
+    if entry and not bucket.try_acquire():
+        _count("stale")
+        return entry
+    if not entry and not bucket.acquire(timeout=THROTTLE_WAIT_SECONDS):
+        _count("throttled")
+        print(f"[GitHub Rate Limit] Skipping {url}; next request allowed in {bucket.wait_time():.0f}s.")
+        return None
+
+    headers = get_headers()
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = http_client.get(url, headers=headers, timeout=10)
+    if resp.status_code == 304:
+        bucket.refund()  # GitHub does not count 304s against the rate limit
+    _observe_rate_limit(url, resp)
+
+    if resp.status_code == 304 and entry:
+        _count("revalidated")
+        entry = dict(entry, fetched_at=time.monotonic())
+        _store_entry(url, entry)
+        return entry
+
+    _count("misses")
+
+    if not resp.ok:
+        if entry and resp.status_code in (403, 429):
+            _count("stale")
+            return entry
+        return None
+
+    entry = {
+        "data": resp.json(),
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "link": resp.headers.get("Link"),
+        "fetched_at": time.monotonic(),
+    }
+    _store_entry(url, entry)
+    return entry
+
+
+def parse_link_header(value: str) -> dict:
+    """
+    Parses a Link header into {rel: url}, e.g. {"next": ..., "last": ...}.
+    """
+    return {rel: url for url, rel in _LINK.findall(value or "")}
+
+
+def _page_number(url: str):
+    if not url:
+        return None
+    for name, value in parse_qsl(urlsplit(url).query):
+        if name == "page" and value.isdigit():
+            return int(value)
+    return None
+
+
+def _with_page(url: str, page: int) -> str:
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query, safe=":+")))
+
+
+def iter_pages(url: str, max_pages: int = None):
+    """
+    Yields the decoded JSON body of every page of a paginated GitHub list, in order.
+
+    The first page is yielded as soon as it arrives. If its Link header names the
+    last page, the remaining pages are fetched in parallel on a shared pool of
+    PAGE_WORKERS threads and each is yielded once it and the pages before it are in;
+    otherwise `next` links are followed one at a time. Every page goes through the
+    shared cache, request coalescing and rate limiting. Pages that fail are skipped.
+    """
+    max_pages = max_pages or MAX_PAGES
+    first = _cached_entry(url)
+    if first is None:
+        return
+    yield first["data"]
+
+    links = parse_link_header(first.get("link"))
+    last = _page_number(links.get("last"))
+    if last:
+        start = _page_number(links.get("next")) or 2
+        urls = [_with_page(links["last"], page) for page in range(start, min(last, max_pages) + 1)]
+        futures = [_page_pool.submit(contextvars.copy_context().run, _cached_entry, page_url) for page_url in urls]
+        try:
+            for page_url, future in zip(urls, futures):
+                entry = future.result()
+                if entry is None:
+                    print(f"[GitHub Pagination Error] Skipping {page_url}")
+                    continue
+                yield entry["data"]
+        finally:
+            for future in futures:
+                future.cancel()
+        return
+
+    pages = 1
+    next_url = links.get("next")
+    while next_url and pages < max_pages:
+        entry = _cached_entry(next_url)
+        if entry is None:
+            print(f"[GitHub Pagination Error] Stopping at {next_url}")
+            return
+        yield entry["data"]
+        pages += 1
+        next_url = parse_link_header(entry.get("link")).get("next")
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns hit/miss counters and current size of the shared GitHub response cache.
+    """
+    with _cache_lock:
+        return dict(_cache_stats, size=len(_response_cache), max_size=CACHE_MAX_ENTRIES)
+
+
+def clear_cache() -> None:
+    """
+    Drops all cached GitHub responses and resets the counters.
+    """
+    with _cache_lock:
+        _response_cache.clear()
+        for key in _cache_stats:
+            _cache_stats[key] = 0
+
+
+def _repo_items(repos: list) -> list:
+    return [{"name": repo.get("name", ""), "html_url": repo.get("html_url", "#")} for repo in repos]
+
+
+def _pr_items(prs_data: dict) -> list:
+    return [
+        {
+            "title": pr.get("title", "Untitled"),
+            "html_url": pr.get("html_url", "#"),
+            "state": pr.get("state", "unknown"),
+        }
+        for pr in prs_data.get("items", [])
+    ]
+
+
 def get_github_profile(username: str = None) -> dict:
     """
-    Fetches GitHub profile details and recent repositories.
+    Fetches GitHub profile details. Repositories are listed by iter_repositories.
     """
     username = username or os.getenv("GITHUB_USERNAME", DEFAULT_USERNAME)
-    url_profile = f"https://api.github.com/users/{username}"
-    url_repos = f"https://api.github.com/users/{username}/repos?per_page=5&sort=updated"
+    url_profile = f"{GITHUB_API_URL}/users/{username}"
 
     try:
-        user_resp = requests.get(url_profile, headers=get_headers(), timeout=10)
-        repos_resp = requests.get(url_repos, headers=get_headers(), timeout=10)
-
-        if user_resp.ok and repos_resp.ok:
-            user_data = user_resp.json()
-            repos = repos_resp.json()
+        user_data = _cached_get(url_profile)
 
+        if user_data is not None:
             return {
                 "avatar_url": user_data.get("avatar_url", ""),
                 "name": user_data.get("login", "N/A"),
                 "bio": user_data.get("bio") or "No bio provided.",
-                "repos": [
-                    {"name": repo.get("name", ""), "html_url": repo.get("html_url", "#")}
-                    for repo in repos
-                ],
             }
 
     except Exception as e:
@@ -50,7 +306,6 @@ def get_github_profile(username: str = None) -> dict:
         "avatar_url": "",
         "name": "N/A",
         "bio": "GitHub profile fetch failed.",
-        "repos": [],
     }
 
 
@@ -59,22 +314,40 @@ def get_pull_requests(username: str = None) -> list:
     Fetches public pull requests authored by the specified user.
     """
     username = username or os.getenv("GITHUB_USERNAME", DEFAULT_USERNAME)
-    url_prs = f"https://api.github.com/search/issues?q=author:{username}+type:pr"
+    url_prs = f"{GITHUB_API_URL}/search/issues?q=author:{username}+type:pr"
 
     try:
-        prs_resp = requests.get(url_prs, headers=get_headers(), timeout=10)
-        if prs_resp.ok:
-            items = prs_resp.json().get("items", [])
-            return [
-                {
-                    "title": pr.get("title", "Untitled"),
-                    "html_url": pr.get("html_url", "#"),
-                    "state": pr.get("state", "unknown"),
-                }
-                for pr in items
-            ]
+        prs_data = _cached_get(url_prs)
+        if prs_data is not None:
+            return _pr_items(prs_data)
 
     except Exception as e:
         print(f"[GitHub PR Fetch Error] {e}")
 
     return []
+
+
+def iter_repositories(username: str = None, max_pages: int = None):
+    """
+    Yields all of a user's repositories, most recently updated first, one page (list) at a time.
+    """
+    username = username or os.getenv("GITHUB_USERNAME", DEFAULT_USERNAME)
+    url = f"{GITHUB_API_URL}/users/{username}/repos?per_page={PER_PAGE}&sort=updated"
+    try:
+        for page in iter_pages(url, max_pages):
+            yield _repo_items(page)
+    except Exception as e:
+        print(f"[GitHub Repo Fetch Error] {e}")
+
+
+def iter_pull_requests(username: str = None, max_pages: int = None):
+    """
+    Yields all public pull requests authored by the user, one page (list) at a time.
+    """
+    username = username or os.getenv("GITHUB_USERNAME", DEFAULT_USERNAME)
+    url = f"{GITHUB_API_URL}/search/issues?q=author:{username}+type:pr&per_page={PER_PAGE}"
+    try:
+        for page in iter_pages(url, max_pages):
+            yield _pr_items(page)
+    except Exception as e:
+        print(f"[GitHub PR Fetch Error] {e}")
@@ -0,0 +1,158 @@
+# backend/http_client.py
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from backend.tracing import span
+
+load_dotenv()
+
+# Configurable Limits
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # Distinct hosts cached per session
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))         # Keep-alive connections per host
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))            # Retries on 429/5xx and connection errors
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))  # 0.5s, 1s, 2s, ...
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))         # Seconds, used when a call sets none
+MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "10"))  # Longer Retry-After waits go back to the caller
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REFUSED_STATUSES = (429,)  # The server refused the request without running it, so even a POST can be resent
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_retry_class = None  # Defined with the first session, so importing this module doesn't load requests
+_deadline = contextvars.ContextVar("http_deadline", default=None)  # time.monotonic() every request must end by
+
+
+def _define_retry_class():
+    from urllib3.exceptions import MaxRetryError, ResponseError
+    from urllib3.util.retry import Retry
+
+    class BoundedRetry(Retry):
+        """
+        Retry that honours short Retry-After headers but hands the response straight back
+        when the server asks for a longer wait, instead of blocking the calling thread.
+
+        Idempotent methods are retried on every RETRY_STATUSES code. Other methods (the
+        LLM POSTs) only on REFUSED_STATUSES: a 5xx may arrive after the upstream already
+        ran, and billed, the generation. Connection errors are retried for every method
+        only while the request had not been sent (urllib3's connect retries). Nothing
+        is retried once the deadline set around the request has passed.
+        """
+
+        def is_retry(self, method, status_code, has_retry_after=False):
+            if status_code in REFUSED_STATUSES and not self._is_method_retryable(method):
+                return bool(self.total)
+            return super().is_retry(method, status_code, has_retry_after)
+
+        def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+            at = _deadline.get()
+            if at is not None and time.monotonic() >= at:
+                raise MaxRetryError(_pool, url, error or ResponseError("Deadline passed before a retry"))
+            if response is not None:
+                retry_after = self.get_retry_after(response)
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                    raise MaxRetryError(_pool, url, ResponseError(f"Retry-After {retry_after:.0f}s exceeds the limit"))
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    return BoundedRetry
+
+
+def _build_session() -> "requests.Session":
+    """
+    Creates a keep-alive session with a sized connection pool and retry policy.
+    Called with _sessions_lock held.
+    """
+    global _retry_class
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    if _retry_class is None:
+        _retry_class = _define_retry_class()
+    retry = _retry_class(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=_retry_class.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the final response back so callers keep their own error handling
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url: str) -> "requests.Session":
+    """
+    Returns the shared pooled session for the URL's upstream host.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc.lower())
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _build_session()
+        return session
+
+
+@contextmanager
+def deadline(at: float):
+    """
+    Caps the timeout of every request sent inside the block, in this context, so
+    none waits past `at` (a time.monotonic() value).
+    """
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _cap_timeout(timeout, url: str):
+    at = _deadline.get()
+    if at is None:
+        return timeout
+    remaining = at - time.monotonic()
+    if remaining <= 0:
+        import requests
+        raise requests.Timeout(f"Deadline passed before requesting {url}")
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def request(method: str, url: str, **kwargs) -> "requests.Response":
+    """
+    Sends a request through the pooled session for its host with a default timeout,
+    shortened to fit the deadline set around the call, if any.
+    """
+    kwargs["timeout"] = _cap_timeout(kwargs.get("timeout", DEFAULT_TIMEOUT), url)
+    with span("http", host=urlsplit(url).netloc, method=method) as http_span:
+        response = get_session(url).request(method, url, **kwargs)
+        http_span.set(status=response.status_code)
+    return response
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    return request("POST", url, **kwargs)
+
+
+def close_all() -> None:
+    """
+    Closes every pooled session, e.g. on shutdown or in tests.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
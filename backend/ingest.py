@@ -0,0 +1,291 @@
+# backend/ingest.py
+#
+# Streaming ingestion for large uploads: the upload is spooled to a temp file,
+# memory-mapped, extracted as a generator of text chunks and summarized as the
+# chunks arrive, so neither the file nor its full text is ever held in memory at once.
+
+import codecs
+import hashlib
+import itertools
+import mmap
+import os
+import tempfile
+from dotenv import load_dotenv
+from backend import doc_index, extraction_cache
+from backend.file_processor import EXTRACTOR_VERSION
+from backend.summarizer import summarize_chunks
+from backend.tracing import span, traced
+
+load_dotenv()
+
+# Configurable Limits
+MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))  # Larger uploads are refused
+MAX_TEXT_CHARS = int(os.getenv("INGEST_MAX_TEXT_CHARS", str(50_000_000)))            # Extraction stops after this much text
+CHUNK_BYTES = int(os.getenv("INGEST_CHUNK_BYTES", str(1024 * 1024)))                 # Read and decode granularity
+SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR") or None                                    # Temp files go here; default system temp
+SUMMARIZE_OVER_CHARS = 5000                                                           # Shorter text is passed through whole
+TRUNCATED_MARKER = "\n\n... [Extraction stopped at the size limit] ...\n\n"
+
+EMPTY_MESSAGES = {
+    "text": "⚠️ Empty text file.",
+    "pdf": "⚠️ PDF has no extractable text.",
+    "docx": "⚠️ Word document is empty.",
+    "image": "⚠️ No text detected in image.",
+}
+PLACEHOLDERS = {
+    "excel": "📊 Excel file detected. Parsing not implemented.",
+    "powerpoint": "📈 PowerPoint file detected. Parsing not implemented.",
+}
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def file_kind(file_type: str, file_name: str):
+    """
+    Maps an upload to the extractor process_file would use, or None if unsupported.
+    """
+    if "text" in file_type:
+        return "text"
+    if file_name.endswith(".pdf"):
+        return "pdf"
+    if file_name.endswith(".docx"):
+        return "docx"
+    if file_name.endswith((".xlsx", ".xls")):
+        return "excel"
+    if file_name.endswith((".pptx", ".ppt")):
+        return "powerpoint"
+    if "image" in file_type:
+        return "image"
+    return None
+
+
+def spool_upload(uploaded_file, max_bytes: int = None) -> tuple:
+    """
+    Copies an upload to a temp file in CHUNK_BYTES blocks, hashing it on the way.
+    The caller owns the file and must delete it.
+
+    Returns:
+        tuple: (path, size, sha256 hex digest)
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    digest = hashlib.sha256()
+    size = 0
+    uploaded_file.seek(0)
+    spool = tempfile.NamedTemporaryFile(prefix="ingest-", dir=SPOOL_DIR, delete=False)
+    try:
+        with spool:
+            while True:
+                block = uploaded_file.read(CHUNK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+                digest.update(block)
+                spool.write(block)
+    except BaseException:
+        os.remove(spool.name)
+        raise
+    finally:
+        uploaded_file.seek(0)
+    return spool.name, size, digest.hexdigest()
+
+
+def upload_digest(uploaded_file):
+    """
+    SHA-256 hex digest of an upload that is already held in memory (Streamlit
+    UploadedFile, LocalFile), so cache hits need no spooling. None otherwise.
+
+    Raises:
+        UploadTooLarge: If the upload exceeds MAX_UPLOAD_BYTES.
+    """
+    if not hasattr(uploaded_file, "getbuffer"):
+        return None
+    data = uploaded_file.getbuffer()
+    try:
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise UploadTooLarge(f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit.")
+        return hashlib.sha256(data).hexdigest()
+    finally:
+        data.release()
+
+
+def _iter_text_file(path: str, size: int, on_progress):
+    """
+    Decodes a memory-mapped UTF-8 file CHUNK_BYTES at a time; multi-byte
+    characters split across blocks are carried over by the incremental decoder.
+    """
+    if size == 0:
+        return
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, size, CHUNK_BYTES):
+            text = decoder.decode(mapped[offset:offset + CHUNK_BYTES], final=offset + CHUNK_BYTES >= size)
+            if text:
+                yield text
+            on_progress(min(offset + CHUNK_BYTES, size) / size)
+
+
+def _iter_pdf(path: str, on_progress):
+    from backend import parallel_extract
+
+    page_count = parallel_extract.pdf_page_count(path)
+    for index, text in enumerate(parallel_extract.iter_pdf_pages(path, page_count), 1):
+        if text:
+            yield text + " "
+        on_progress(index / page_count)
+
+
+def _iter_whole(text: str):
+    """
+    Re-chunks text from extractors that only work on whole documents.
+    """
+    for start in range(0, len(text), CHUNK_BYTES):
+        yield text[start:start + CHUNK_BYTES]
+
+
+def iter_file_chunks(path: str, kind: str, size: int, on_progress=None, max_chars: int = None):
+    """
+    Extracts text from a spooled file as a generator of chunks in document order.
+    Text and PDFs are extracted incrementally; DOCX and images need the whole
+    document in their libraries and are re-chunked afterwards.
+    Stops with TRUNCATED_MARKER once max_chars of text have been produced.
+    """
+    max_chars = MAX_TEXT_CHARS if max_chars is None else max_chars
+    on_progress = on_progress or (lambda fraction: None)
+
+    if kind == "text":
+        chunks = _iter_text_file(path, size, on_progress)
+    elif kind == "pdf":
+        chunks = _iter_pdf(path, on_progress)
+    elif kind == "docx":
+        import docx2txt
+        chunks = _iter_whole(docx2txt.process(path))
+    elif kind == "image":
+        from backend import parallel_extract
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            chunks = _iter_whole(parallel_extract.extract_image(mapped))
+    else:
+        return
+
+    produced = 0
+    try:
+        for chunk in chunks:
+            if produced + len(chunk) > max_chars:
+                yield chunk[:max_chars - produced]
+                yield TRUNCATED_MARKER
+                return
+            produced += len(chunk)
+            yield chunk
+    finally:
+        chunks.close()
+        on_progress(1.0)
+
+
+@traced("file.ingest")
+def ingest_file(uploaded_file, on_progress=None, max_tokens: int = 1000, mode: str = "windowed") -> str:
+    """
+    Streaming counterpart of process_file + summarize_text for large uploads.
+    Text up to SUMMARIZE_OVER_CHARS is returned whole; longer text is summarized
+    chunk by chunk as it is extracted. Results are cached by content hash.
+
+    Args:
+        uploaded_file: Streamlit UploadedFile or LocalFile.
+        on_progress (callable): Optional on_progress(fraction) called as extraction advances.
+        max_tokens (int): Summary token budget.
+        mode (str): Summarization mode passed to summarize_chunks.
+
+    Returns:
+        str: Extracted text or its summary, or a descriptive error message.
+    """
+    text, _ = _ingest(uploaded_file, on_progress, max_tokens, mode, with_index=False)
+    return text
+
+
+@traced("file.ingest")
+def ingest_and_index(uploaded_file, on_progress=None, max_tokens: int = 1000, mode: str = "windowed") -> tuple:
+    """
+    Like ingest_file, and also builds a BM25 chunk index of the full text from the
+    same extraction pass. Indexes are cached per file hash in backend.doc_index.
+
+    Returns:
+        tuple: (text, index) where index is a DocumentIndex, or None when extraction failed.
+    """
+    return _ingest(uploaded_file, on_progress, max_tokens, mode, with_index=True)
+
+
+def _ingest(uploaded_file, on_progress, max_tokens: int, mode: str, with_index: bool) -> tuple:
+    file_type = uploaded_file.type.lower()
+    file_name = uploaded_file.name.lower()
+    kind = file_kind(file_type, file_name)
+    if kind is None:
+        return "❌ Unsupported file type.", None
+    if kind in PLACEHOLDERS:
+        return PLACEHOLDERS[kind], None
+
+    extension = file_name.rsplit(".", 1)[-1] if "." in file_name else ""
+    kind_tag = f"{file_type}|{extension}|ingest|{max_tokens}|{mode}"
+    path = None
+    try:
+        # Hash the in-memory upload and check the caches before copying anything to disk
+        digest = upload_digest(uploaded_file)
+        if digest is None:
+            path, size, digest = spool_upload(uploaded_file)
+        cache_key = extraction_cache.key_for_digest(digest, kind_tag, EXTRACTOR_VERSION)
+        index_key = doc_index.cache_key(digest)
+        cached = extraction_cache.get(cache_key)
+        index = doc_index.get_cached(index_key) if with_index else None
+        if cached is not None and (index is not None or not with_index):
+            if path:
+                os.remove(path)
+            return cached, index
+        if path is None:
+            path, size, _ = spool_upload(uploaded_file)
+    except UploadTooLarge as e:
+        if path:
+            os.remove(path)
+        return f"⚠️ {e}", None
+    except Exception as e:
+        if path:
+            os.remove(path)
+        return f"⚠️ Error processing file: {str(e)}", None
+
+    try:
+        with span("file.extract", type=file_type, bytes=size, streaming=True):
+            chunks = iter_file_chunks(path, kind, size, on_progress)
+            if with_index:
+                index = doc_index.DocumentIndex()
+                chunks = index.index_stream(chunks)
+
+            head = []
+            head_chars = 0
+            for chunk in chunks:
+                head.append(chunk)
+                head_chars += len(chunk)
+                if head_chars > SUMMARIZE_OVER_CHARS:
+                    break
+
+            if cached is not None:
+                text = cached
+                for _ in chunks:
+                    pass  # Only the index was missing; drain the stream into it
+            elif head_chars > SUMMARIZE_OVER_CHARS:
+                text = summarize_chunks(itertools.chain(head, chunks), max_tokens, mode)
+            else:
+                text = "".join(head).strip() or EMPTY_MESSAGES[kind]
+
+    except Exception as e:
+        return f"⚠️ Error processing file: {str(e)}", None
+    finally:
+        os.remove(path)
+
+    if not text.startswith("⚠️"):
+        extraction_cache.put(cache_key, text)
+    if index is not None:
+        if index.finished:
+            doc_index.put_cached(index_key, index)
+        else:
+            index = None  # Summarization stopped early; a partial index would silently miss sections
+    return text, index
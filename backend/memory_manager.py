@@ -1,48 +1,316 @@
-# Core conversation initialization with persistent AI context
-conversation_history = [
-    {"role": "system", "content": "You are a helpful AI assistant."}
-]
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dotenv import load_dotenv
+from backend.summarizer import get_encoder
 
-# Temporary chat memory for sidebar user events
-chat_memory = []
+load_dotenv()
 
 # Configurable Limits
 MAX_HISTORY_LENGTH = 50   # Keeps AI context window reasonable
 MAX_CHAT_MEMORY = 100     # Prevents sidebar memory overflow
+MAX_HISTORY_TOKENS = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))  # Leaves room for the reply in llama3-8b-8192
+MESSAGE_TOKEN_OVERHEAD = 4  # Role and separator tokens the chat format adds per message
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "500"))                   # Sessions held in memory at once
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))  # Idle sessions are dropped from memory
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "")                        # Empty disables SQLite persistence
+MEMORY_RETENTION_SECONDS = float(os.getenv("MEMORY_RETENTION_SECONDS", str(30 * 86400)))  # Stored sessions idle this long are deleted
+RETENTION_SWEEP_SECONDS = 3600                                          # How often idle stored sessions are looked for
 
+DEFAULT_SESSION = "default"
 
-def add_to_memory(entry: str) -> None:
+SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+
+def count_message_tokens(content: str) -> int:
+    """
+    Returns the prompt tokens a chat message costs, including per-message overhead.
+    """
+    return len(get_encoder().encode(content)) + MESSAGE_TOKEN_OVERHEAD
+
+
+class TokenWindow:
+    """
+    Conversation turns kept under a token budget, always led by the system prompt.
+    Each message is tokenized once on append; the oldest turns are evicted in O(1).
+    """
+
+    def __init__(self, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = MAX_HISTORY_TOKENS,
+                 max_messages: int = MAX_HISTORY_LENGTH):
+        self.system_message = {"role": "system", "content": system_prompt}
+        self.system_tokens = count_message_tokens(system_prompt)
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self._turns = deque()  # (message, token_count), oldest first
+        self._turn_tokens = 0
+
+    def append(self, role: str, content: str) -> None:
+        tokens = count_message_tokens(content)
+        self._turns.append(({"role": role, "content": content}, tokens))
+        self._turn_tokens += tokens
+        self._trim()
+
+    def _trim(self) -> None:
+        # The newest turn always stays, even if it alone exceeds the budget
+        while len(self._turns) > 1 and (
+            self.token_count > self.max_tokens or len(self._turns) + 1 > self.max_messages
+        ):
+            _, tokens = self._turns.popleft()
+            self._turn_tokens -= tokens
+
+    @property
+    def token_count(self) -> int:
+        return self.system_tokens + self._turn_tokens
+
+    def messages(self) -> list:
+        return [self.system_message] + [message for message, _ in self._turns]
+
+    def clear(self) -> None:
+        self._turns.clear()
+        self._turn_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self._turns) + 1
+
+
+class SessionMemory:
+    """
+    Everything remembered for one chat session: the AI context window and the sidebar memory.
+    All mutation happens under the session's own lock.
+    """
+
+    def __init__(self):
+        self.history = TokenWindow()
+        self.chat_memory = deque(maxlen=MAX_CHAT_MEMORY)
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """
+    Session-keyed conversation store shared by all Streamlit sessions in the process.
+
+    Sessions are kept in least-recently-used order; ones idle for SESSION_IDLE_SECONDS,
+    or beyond MAX_SESSIONS, are dropped from memory. With MEMORY_DB_PATH set, every
+    message is also written to SQLite and a returning session is reloaded lazily.
+    Stored rows are capped per session like the in-memory ones, and sessions idle
+    for longer than retention_seconds are deleted.
+    """
+
+    def __init__(self, db_path: str = MEMORY_DB_PATH, max_sessions: int = MAX_SESSIONS,
+                 idle_seconds: float = SESSION_IDLE_SECONDS, retention_seconds: float = MEMORY_RETENTION_SECONDS):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.retention_seconds = retention_seconds
+        self._next_sweep = 0.0
+        self._sessions = OrderedDict()  # session_id -> SessionMemory, least recently used first
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionMemory:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = now
+                return session
+
+            session = self._sessions[session_id] = SessionMemory()
+            self._evict(now)
+            # Hold the new session's lock until it is loaded so no caller sees it half-restored
+            session.lock.acquire()
+
+        try:
+            self._load(session_id, session)
+        finally:
+            session.lock.release()
+        return session
+
+    def _evict(self, now: float) -> None:
+        """
+        Drops idle sessions and the least recently used beyond the cap. Caller holds _lock.
+        """
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_used < self.idle_seconds:
+                break
+            del self._sessions[oldest_id]
+
+    def add_history(self, session_id: str, role: str, content: str) -> None:
+        session = self.get(session_id)
+        with session.lock:
+            session.history.append(role, content)
+        self._persist(session_id, "history", role, content)
+
+    def add_memory(self, session_id: str, entry: str) -> None:
+        session = self.get(session_id)
+        with session.lock:
+            session.chat_memory.append(entry)
+        self._persist(session_id, "memory", None, entry)
+
+    def history(self, session_id: str) -> list:
+        session = self.get(session_id)
+        with session.lock:
+            return session.history.messages()
+
+    def memory(self, session_id: str) -> list:
+        session = self.get(session_id)
+        with session.lock:
+            return list(session.chat_memory)
+
+    def clear(self, session_id: str, history: bool = True, memory: bool = True) -> None:
+        session = self.get(session_id)
+        with session.lock:
+            if history:
+                session.history.clear()
+            if memory:
+                session.chat_memory.clear()
+
+        kinds = [kind for kind, wanted in (("history", history), ("memory", memory)) if wanted]
+        self._execute(
+            f"DELETE FROM messages WHERE session_id = ? AND kind IN ({','.join('?' * len(kinds))})",
+            (session_id, *kinds),
+        )
+
+    def _connect(self):
+        """
+        Opens the shared SQLite connection on first use. Caller holds _db_lock.
+        """
+        if self._db is None and self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, kind TEXT, role TEXT, content TEXT, "
+                "created_at REAL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(messages)")}
+            if "created_at" not in columns:
+                # Databases from before retention: their rows start the retention clock now
+                self._db.execute("ALTER TABLE messages ADD COLUMN created_at REAL")
+                self._db.execute("UPDATE messages SET created_at = ?", (time.time(),))
+            self._db.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, kind, id)")
+            self._db.commit()
+        return self._db
+
+    def _execute(self, sql: str, params: tuple) -> list:
+        if not self.db_path:
+            return []
+        with self._db_lock:
+            try:
+                db = self._connect()
+                rows = db.execute(sql, params).fetchall()
+                db.commit()
+                return rows
+            except sqlite3.Error as e:
+                print(f"[Memory Store Error] {e}")
+                return []
+
+    def _persist(self, session_id: str, kind: str, role, content: str) -> None:
+        """
+        Stores one message, then keeps only the newest rows of that session and kind
+        (as many as _load restores) and, at most once per RETENTION_SWEEP_SECONDS,
+        deletes sessions idle for longer than retention_seconds.
+        """
+        if not self.db_path:
+            return
+        now = time.time()
+        keep = MAX_HISTORY_LENGTH if kind == "history" else MAX_CHAT_MEMORY
+        with self._db_lock:
+            try:
+                db = self._connect()
+                db.execute(
+                    "INSERT INTO messages (session_id, kind, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, kind, role, content, now),
+                )
+                db.execute(
+                    "DELETE FROM messages WHERE session_id = ? AND kind = ? AND id <= ("
+                    "SELECT id FROM messages WHERE session_id = ? AND kind = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, kind, session_id, kind, keep),
+                )
+                if now >= self._next_sweep:
+                    self._next_sweep = now + RETENTION_SWEEP_SECONDS
+                    db.execute(
+                        "DELETE FROM messages WHERE session_id IN ("
+                        "SELECT session_id FROM messages GROUP BY session_id HAVING MAX(created_at) < ?)",
+                        (now - self.retention_seconds,),
+                    )
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"[Memory Store Error] {e}")
+
+    def _load(self, session_id: str, session: SessionMemory) -> None:
+        """
+        Restores the most recent messages of a returning session from SQLite.
+        Caller holds the session's lock.
+        """
+        history_rows = self._execute(
+            "SELECT role, content FROM messages WHERE session_id = ? AND kind = 'history' "
+            "ORDER BY id DESC LIMIT ?",
+            (session_id, MAX_HISTORY_LENGTH),
+        )
+        memory_rows = self._execute(
+            "SELECT content FROM messages WHERE session_id = ? AND kind = 'memory' ORDER BY id DESC LIMIT ?",
+            (session_id, MAX_CHAT_MEMORY),
+        )
+        for role, content in reversed(history_rows):
+            session.history.append(role, content)
+        for (content,) in reversed(memory_rows):
+            session.chat_memory.append(content)
+
+
+# Core conversation store, one bounded context per chat session
+session_store = SessionStore()
+
+
+def add_to_memory(entry: str, session_id: str = DEFAULT_SESSION) -> None:
     """
     Adds user events or prompts to sidebar memory with safety checks.
     """
     if isinstance(entry, str) and entry.strip():
-        chat_memory.append(entry)
-        if len(chat_memory) > MAX_CHAT_MEMORY:
-            chat_memory.pop(0)
+        session_store.add_memory(session_id, entry)
 
 
-def get_chat_memory() -> list:
+def get_chat_memory(session_id: str = DEFAULT_SESSION) -> list:
     """
     Returns a copy of current chat memory for UI display.
     """
-    return chat_memory.copy()
+    return session_store.memory(session_id)
 
 
-def add_to_history(role: str, content: str) -> None:
+def add_to_history(role: str, content: str, session_id: str = DEFAULT_SESSION) -> None:
     """
     Adds structured messages to persistent conversation history for AI.
-    Ensures system prompt and recent context are retained.
+    Ensures system prompt and recent context are retained within the token budget.
     """
     if role in {"user", "assistant", "system"} and isinstance(content, str) and content.strip():
-        conversation_history.append({"role": role, "content": content})
+        session_store.add_history(session_id, role, content)
 
-        if len(conversation_history) > MAX_HISTORY_LENGTH:
-            # Retain system prompt and most recent exchanges
-            conversation_history[:] = [conversation_history[0]] + conversation_history[-(MAX_HISTORY_LENGTH - 1):]
 
-
-def get_conversation_history() -> list:
+def get_conversation_history(session_id: str = DEFAULT_SESSION) -> list:
     """
     Provides a copy of structured conversation history for AI context.
     """
-    return conversation_history.copy()
+    return session_store.history(session_id)
+
+
+def clear_history(session_id: str = DEFAULT_SESSION) -> None:
+    """
+    Drops all turns while keeping the system prompt.
+    """
+    session_store.clear(session_id, memory=False)
+
+
+def clear_session(session_id: str = DEFAULT_SESSION) -> None:
+    """
+    Forgets both the conversation history and the sidebar memory of a session.
+    """
+    session_store.clear(session_id)
@@ -0,0 +1,232 @@
+# backend/parallel_extract.py
+
+import io
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+import pytesseract
+import PyPDF2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configurable Limits
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))  # Processes in the pool
+MIN_PARALLEL_PAGES = int(os.getenv("EXTRACTION_MIN_PARALLEL_PAGES", "8"))            # Smaller PDFs stay in-process
+TILE_MIN_PIXELS = int(os.getenv("EXTRACTION_TILE_MIN_PIXELS", str(4_000_000)))       # Smaller images are OCR'd whole
+TILE_MIN_HEIGHT = 600     # Never cut bands thinner than this many pixels
+CUT_SEARCH_ROWS = 80      # How far to look around a nominal cut for a blank row
+BLANK_ROW_SPREAD = 16     # Max grey-level spread for a row to count as blank
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Lazily starts the shared extraction process pool.
+    Spawned (not forked) workers keep the threaded Streamlit server safe.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _run_parallel(fn, jobs: list) -> list:
+    """
+    Maps fn over argument tuples in the pool, preserving order.
+    Falls back to running in-process if the pool is unavailable or breaks.
+    """
+    if len(jobs) > 1 and EXTRACTION_WORKERS > 1:
+        try:
+            pool = _get_pool()
+            futures = [pool.submit(fn, *args) for args in jobs]
+            return [future.result() for future in futures]
+        except (BrokenProcessPool, OSError) as e:
+            print(f"[Extraction Pool Error] {e}; continuing in-process.")
+            _reset_pool()
+
+    return [fn(*args) for args in jobs]
+
+
+def _ocr_page_images(page) -> str:
+    """
+    OCRs the images embedded in a PDF page that has no text layer (typical for scans).
+    """
+    texts = []
+    for embedded in getattr(page, "images", []):
+        try:
+            image = Image.open(io.BytesIO(embedded.data))
+            texts.append(pytesseract.image_to_string(image).strip())
+        except Exception:
+            continue
+    return "\n".join(filter(None, texts))
+
+
+def _page_text(page) -> str:
+    text = page.extract_text() or ""
+    if not text.strip():
+        text = _ocr_page_images(page)
+    return text
+
+
+def _extract_pdf_pages(data: bytes, start: int, stop: int) -> list:
+    """
+    Worker: extracts pages [start, stop) of a PDF, OCRing pages without a text layer.
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [_page_text(reader.pages[index]) for index in range(start, stop)]
+
+
+def _extract_pdf_file_pages(path: str, start: int, stop: int) -> list:
+    """
+    Worker: like _extract_pdf_pages, but reads the PDF from disk so the document
+    isn't pickled to every worker.
+    """
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [_page_text(reader.pages[index]) for index in range(start, stop)]
+
+
+def pdf_page_count(path: str) -> int:
+    with open(path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def iter_pdf_pages(path: str, page_count: int = None):
+    """
+    Yields the text of each page of a PDF on disk in document order, as soon as
+    its batch is done. Batches run in the process pool; only finished batches
+    waiting for an earlier one are held in memory.
+    """
+    page_count = pdf_page_count(path) if page_count is None else page_count
+    if page_count < MIN_PARALLEL_PAGES or EXTRACTION_WORKERS < 2:
+        with open(path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            for index in range(page_count):
+                yield _page_text(reader.pages[index])
+        return
+
+    batch_size = math.ceil(page_count / min(page_count, EXTRACTION_WORKERS * 2))
+    batches = [(start, min(start + batch_size, page_count)) for start in range(0, page_count, batch_size)]
+
+    futures = []
+    try:
+        pool = _get_pool()
+        futures = [pool.submit(_extract_pdf_file_pages, path, start, stop) for start, stop in batches]
+        for (start, stop), future in zip(batches, futures):
+            try:
+                texts = future.result()
+            except (BrokenProcessPool, OSError) as e:
+                print(f"[Extraction Pool Error] {e}; continuing in-process.")
+                _reset_pool()
+                texts = _extract_pdf_file_pages(path, start, stop)
+            yield from texts
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_pdf(data: bytes) -> str:
+    """
+    Extracts PDF text page by page, spreading page batches across the process pool.
+    Pages are reassembled in document order. For parallel runs the PDF is written to
+    a temp file once and workers open it themselves, instead of every batch task
+    pickling the whole document.
+    """
+    page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    if page_count < MIN_PARALLEL_PAGES or EXTRACTION_WORKERS < 2:
+        pages = _extract_pdf_pages(data, 0, page_count)
+    else:
+        batch_count = min(page_count, EXTRACTION_WORKERS * 2)
+        batch_size = math.ceil(page_count / batch_count)
+        with tempfile.NamedTemporaryFile(prefix="extract-", suffix=".pdf", delete=False) as spool:
+            spool.write(data)
+        try:
+            jobs = [
+                (spool.name, start, min(start + batch_size, page_count))
+                for start in range(0, page_count, batch_size)
+            ]
+            pages = [text for batch in _run_parallel(_extract_pdf_file_pages, jobs) for text in batch]
+        finally:
+            os.remove(spool.name)
+
+    return " ".join(filter(None, pages))
+
+
+def _ocr_tile(mode: str, size: tuple, pixels: bytes) -> str:
+    """
+    Worker: OCRs one image band passed as raw pixels to avoid re-encoding.
+    """
+    return pytesseract.image_to_string(Image.frombytes(mode, size, pixels))
+
+
+def _find_cut(gray, nominal: int, low: int, high: int) -> int:
+    """
+    Returns a blank row near the nominal cut so bands don't slice through text lines.
+    """
+    width = gray.width
+    for offset in range(CUT_SEARCH_ROWS + 1):
+        for y in (nominal - offset, nominal + offset):
+            if low < y < high:
+                darkest, lightest = gray.crop((0, y, width, y + 1)).getextrema()
+                if lightest - darkest <= BLANK_ROW_SPREAD:
+                    return y
+    return nominal
+
+
+def _band_bounds(image) -> list:
+    """
+    Splits a large image into horizontal bands, cutting at blank rows where possible.
+    """
+    band_count = min(EXTRACTION_WORKERS, image.height // TILE_MIN_HEIGHT)
+    if image.width * image.height < TILE_MIN_PIXELS or band_count < 2:
+        return [(0, image.height)]
+
+    gray = image.convert("L")
+    band_height = image.height / band_count
+    cuts = [0]
+    for i in range(1, band_count):
+        cuts.append(_find_cut(gray, int(i * band_height), cuts[-1] + TILE_MIN_HEIGHT // 2, image.height))
+    cuts.append(image.height)
+    return list(zip(cuts, cuts[1:]))
+
+
+def extract_image(data: bytes) -> str:
+    """
+    OCRs an image, splitting large scans into bands that are recognised in parallel
+    and joined top to bottom.
+    """
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    bounds = _band_bounds(image)
+    if len(bounds) == 1:
+        return pytesseract.image_to_string(image)
+
+    jobs = []
+    for top, bottom in bounds:
+        band = image.crop((0, top, image.width, bottom))
+        jobs.append((band.mode, band.size, band.tobytes()))
+    return "\n".join(text.strip() for text in _run_parallel(_ocr_tile, jobs))
@@ -0,0 +1,110 @@
+# backend/rate_limit.py
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Starts full at `capacity` tokens and refills at `rate`
+    tokens per second. An upstream's own rate-limit headers can correct it at any time
+    via sync() and pause(), so the local estimate never drifts far from the server's.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.default_rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _wait_time(self, now: float, tokens: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """
+        Seconds until `tokens` could be taken, 0 if available now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return self._wait_time(now, tokens)
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Takes tokens if they are available right now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._wait_time(now, tokens) > 0:
+                return False
+            self.tokens -= tokens
+            return True
+
+    def acquire(self, tokens: float = 1, timeout: float = None) -> bool:
+        """
+        Waits up to `timeout` seconds (forever if None) for tokens and takes them.
+        Returns False without waiting when they cannot become available in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self.tokens -= tokens
+                    return True
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    def refund(self, tokens: float = 1) -> None:
+        """
+        Returns tokens for a request the server did not count, e.g. a 304 Not Modified.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def sync(self, remaining: int, reset_in: float) -> None:
+        """
+        Adopts the server's view: `remaining` requests are left until the window
+        resets in `reset_in` seconds. The remaining requests are spread evenly over
+        that time instead of being spent in one burst: the headers can only lower
+        the local count, never top it up, and set the refill rate.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0:
+                self.blocked_until = max(self.blocked_until, now + max(reset_in, 0.0))
+                self.rate = self.default_rate
+            elif reset_in > 0:
+                self.rate = max(remaining / reset_in, 1e-3)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stops handing out tokens for `seconds`, e.g. after a Retry-After header.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def throttled(self) -> bool:
+        return self.wait_time() > 0
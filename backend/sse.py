@@ -0,0 +1,56 @@
+# backend/sse.py
+
+import json
+
+DATA_PREFIX = b"data:"
+DONE_PAYLOAD = b"[DONE]"
+CONTENT_MARKER = b'"content"'
+
+
+def iter_sse_data(byte_chunks):
+    """
+    Incrementally parses a Server-Sent Events stream from raw byte chunks
+    (e.g. response.iter_content(chunk_size=None)) and yields each `data:` payload.
+
+    Lines are located in one growing bytearray and consumed in place; the only
+    per-event allocation is the payload slice itself. Nothing is decoded to str.
+    """
+    buffer = bytearray()
+    for chunk in byte_chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                break
+            line_start, line_end = start, end
+            start = end + 1
+            if line_end > line_start and buffer[line_end - 1] == 0x0D:  # Tolerate CRLF framing
+                line_end -= 1
+            if buffer.startswith(DATA_PREFIX, line_start, line_end):
+                payload_start = line_start + len(DATA_PREFIX)
+                if payload_start < line_end and buffer[payload_start] == 0x20:
+                    payload_start += 1
+                yield buffer[payload_start:line_end]
+        if start:
+            del buffer[:start]
+
+
+def iter_delta_content(byte_chunks):
+    """
+    Yields the `choices[0].delta.content` text of an OpenAI-compatible chat stream.
+    Events without content (role headers, usage, [DONE]) are skipped before JSON parsing.
+    """
+    for payload in iter_sse_data(byte_chunks):
+        if payload == DONE_PAYLOAD or CONTENT_MARKER not in payload:
+            continue
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            continue
+        choices = data.get("choices") or [{}]
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            yield content
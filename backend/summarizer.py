@@ -1,10 +1,280 @@
-import tiktoken
+import functools
+from collections import deque
+from backend.tracing import traced
 
-# Reuse tokenizer for efficiency; compatible with Groq LLaMA3 and OpenAI models
-ENCODER = tiktoken.encoding_for_model("gpt-3.5-turbo")
+TRIM_MARKER = "\n\n... [Content Trimmed for Length] ...\n\n"
+CHARS_PER_TOKEN_GUESS = 4      # Starting window size; windows double until the budget is met
+WINDOW_MARGIN_TOKENS = 8       # Tokens near a window cut may differ from a full encode, so over-read a little
+MIN_CHUNK_SUMMARY_TOKENS = 32  # Smallest per-chunk budget in map-reduce mode
+STREAM_WINDOW_FACTOR = 4       # Streaming keeps this many times the expected window at each end
+STREAM_TAIL_SLACK = 8          # Streaming re-checks its rolling tail once it holds this many windows
+STREAM_REDUCE_FACTOR = 4       # Streaming map-reduce condenses its partial summaries past this many chunks' worth
 
 
-def summarize_text(text: str, max_tokens: int = 1000) -> str:
+@functools.lru_cache(maxsize=None)
+def get_encoder():
+    """
+    Loads the tokenizer on first use instead of at import; compatible with Groq LLaMA3 and OpenAI models.
+    """
+    import tiktoken
+    return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+
+def __getattr__(name):
+    # Keeps `summarizer.ENCODER` working without loading tiktoken at import time
+    if name == "ENCODER":
+        return get_encoder()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _join_head_tail(first_tokens: list, last_tokens: list) -> str:
+    encoder = get_encoder()
+    first_part = encoder.decode(first_tokens).strip()
+    last_part = encoder.decode(last_tokens).strip()
+    return f"{first_part}{TRIM_MARKER}{last_part}"
+
+
+def _summarize_full(text: str, max_tokens: int) -> str:
+    """
+    Original strategy: tokenize the whole text, keep the first and last halves of the budget.
+    """
+    tokens = get_encoder().encode(text)
+
+    if len(tokens) <= max_tokens:
+        return text  # Already within limits
+
+    half = max_tokens // 2
+    return _join_head_tail(tokens[:half], tokens[-half:])
+
+
+def _summarize_windowed(text: str, max_tokens: int) -> str:
+    """
+    Same output as the full strategy, but only tokenizes character windows at each end.
+    Windows start near the expected size and double until each holds half the budget.
+    """
+    encoder = get_encoder()
+    half = max_tokens // 2
+    window = (half + WINDOW_MARGIN_TOKENS) * CHARS_PER_TOKEN_GUESS
+
+    while 2 * window < len(text):
+        head = encoder.encode(text[:window])
+        tail = encoder.encode(text[-window:])
+        if len(head) > half + WINDOW_MARGIN_TOKENS and len(tail) > half + WINDOW_MARGIN_TOKENS:
+            return _join_head_tail(head[:half], tail[-half:])
+        window *= 2
+
+    # Windows would overlap, so the text is small enough to encode whole
+    return _summarize_full(text, max_tokens)
+
+
+def split_into_chunks(text: str, chunk_tokens: int = 2000) -> list:
+    """
+    Splits text into roughly chunk_tokens-sized pieces by character count,
+    preferring paragraph and then whitespace boundaries. Does not tokenize.
+    """
+    chunk_chars = chunk_tokens * CHARS_PER_TOKEN_GUESS
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            floor = start + chunk_chars // 2
+            cut = text.rfind("\n\n", floor, end)
+            if cut == -1:
+                cut = max(text.rfind(" ", floor, end), text.rfind("\n", floor, end))
+            if cut > start:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+
+def summarize_map_reduce(text: str, max_tokens: int = 1000, chunk_tokens: int = 2000, map_fn=None) -> str:
+    """
+    Condenses text that needs more than its head and tail: every chunk is
+    summarized on its own (map), then the partial summaries are joined and
+    condensed again until they fit the budget (reduce).
+
+    Args:
+        text (str): Raw input text.
+        max_tokens (int): Desired token limit for the summary.
+        chunk_tokens (int): Approximate size of each mapped chunk.
+        map_fn (callable): Optional map_fn(chunk, budget) -> str, e.g. an LLM call.
+            Defaults to keeping each chunk's head and tail.
+
+    Returns:
+        str: Summary built from every part of the document.
+    """
+    map_fn = map_fn or _summarize_windowed
+    chunks = split_into_chunks(text, chunk_tokens)
+    if len(chunks) <= 1:
+        return _summarize_windowed(text, max_tokens)
+
+    budget = max(max_tokens // len(chunks), MIN_CHUNK_SUMMARY_TOKENS)
+    combined = "\n\n".join(map_fn(chunk, budget) for chunk in chunks)
+
+    if len(combined) < len(text) and len(combined) > max_tokens * CHARS_PER_TOKEN_GUESS:
+        return summarize_map_reduce(combined, max_tokens, chunk_tokens, map_fn)
+    return _summarize_windowed(combined, max_tokens)
+
+
+def _summarize_stream_windowed(chunks, max_tokens: int) -> str:
+    """
+    Head-and-tail summary of streamed text, with the same output as summarize_text.
+    Holds the first window and a rolling tail of characters, so memory stays bounded
+    whatever the input size. As in _summarize_windowed, a window that tokenizes to
+    less than half the budget is doubled; the tail is only trimmed back to a window
+    that was checked to hold enough tokens.
+    """
+    encoder = get_encoder()
+    half = max_tokens // 2
+    needed = half + WINDOW_MARGIN_TOKENS
+    window = needed * CHARS_PER_TOKEN_GUESS * STREAM_WINDOW_FACTOR
+    tail_window = window
+
+    parts, held = [], 0
+    head_tokens = None
+    tail, tail_chars = deque(), 0
+
+    for chunk in chunks:
+        if head_tokens is None:
+            parts.append(chunk)
+            held += len(chunk)
+            if held <= 2 * window:
+                continue
+            text = "".join(parts)
+            tokens = encoder.encode(text[:window])
+            if len(tokens) <= needed:
+                window *= 2  # Dense text: read more before freezing the head
+                parts = [text]
+                continue
+            # Enough text for the head: freeze it and keep only a rolling tail from here on
+            head_tokens = tokens
+            tail_window = window
+            parts = None
+            chunk = text[window:]
+
+        tail.append(chunk)
+        tail_chars += len(chunk)
+        if tail_chars > STREAM_TAIL_SLACK * tail_window:
+            kept = "".join(tail)[-tail_window:]
+            if len(encoder.encode(kept)) > needed:
+                tail, tail_chars = deque([kept]), len(kept)
+            else:
+                tail_window *= 2
+
+    if head_tokens is None:
+        return _summarize_windowed("".join(parts), max_tokens)
+
+    # The last trim left a window with enough tokens; the end of the text may need more of what followed it
+    kept = "".join(tail)
+    size = tail_window
+    while True:
+        tail_tokens = encoder.encode(kept[-size:])
+        if len(tail_tokens) > needed or size >= len(kept):
+            break
+        size *= 2
+    return _join_head_tail(head_tokens[:half], tail_tokens[-half:])
+
+
+def _summarize_stream_map_reduce(chunks, max_tokens: int, chunk_tokens: int, map_fn) -> str:
+    """
+    Map-reduce over streamed text: every chunk_tokens-sized piece is condensed as soon
+    as it is complete, and the partial summaries are themselves condensed whenever they grow large.
+    """
+    map_fn = map_fn or _summarize_windowed
+    chunk_chars = chunk_tokens * CHARS_PER_TOKEN_GUESS
+    budget = max(max_tokens // STREAM_REDUCE_FACTOR, MIN_CHUNK_SUMMARY_TOKENS)
+
+    pending, pending_chars = [], 0
+    partials, partial_chars = [], 0
+    mapped = 0
+
+    def condense(piece):
+        nonlocal partials, partial_chars, mapped
+        mapped += 1
+        partials.append(map_fn(piece, budget))
+        partial_chars += len(partials[-1])
+        if partial_chars > chunk_chars * STREAM_REDUCE_FACTOR:
+            partials = [summarize_map_reduce("\n\n".join(partials), max_tokens, chunk_tokens, map_fn)]
+            partial_chars = len(partials[0])
+
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_chars += len(chunk)
+        if pending_chars < 2 * chunk_chars:
+            continue
+        pieces = split_into_chunks("".join(pending), chunk_tokens)
+        for piece in pieces[:-1]:
+            condense(piece)
+        pending = pieces[-1:]  # The last piece may continue in the next chunk
+        pending_chars = sum(len(piece) for piece in pending)
+
+    text = "".join(pending)
+    if not mapped:
+        return summarize_map_reduce(text, max_tokens, chunk_tokens, map_fn)
+    for piece in split_into_chunks(text, chunk_tokens):
+        condense(piece)
+
+    combined = "\n\n".join(partials)
+    if len(combined) > max_tokens * CHARS_PER_TOKEN_GUESS:
+        return summarize_map_reduce(combined, max_tokens, chunk_tokens, map_fn)
+    return _summarize_windowed(combined, max_tokens)
+
+
+@traced("summarize.stream")
+def summarize_chunks(chunks, max_tokens: int = 1000, mode: str = "windowed", chunk_tokens: int = 2000,
+                     map_fn=None) -> str:
+    """
+    Summarizes text that arrives as an iterable of string chunks (e.g. streamed file
+    extraction) without ever joining the whole text in memory.
+
+    Args:
+        chunks (iterable): Text chunks in document order.
+        max_tokens (int): Desired token limit for the summary.
+        mode (str): "windowed" (default) keeps the head and a rolling tail,
+            "mapreduce" condenses every chunk as it arrives, "full" joins everything first.
+        chunk_tokens (int): Approximate size of each mapped chunk in map-reduce mode.
+        map_fn (callable): Optional map_fn(chunk, budget) -> str for map-reduce mode.
+
+    Returns:
+        str: Summary, or the original text if it is already within token limits.
+
+    Raises:
+        Exception: Whatever the chunks iterable raised, e.g. an extraction error,
+            so the caller can report it instead of a generic summarization error.
+    """
+    source_errors = []
+
+    def source():
+        iterator = iter(chunks)
+        while True:
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            except Exception as e:
+                source_errors.append(e)
+                raise
+            yield chunk
+
+    try:
+        if mode == "mapreduce":
+            return _summarize_stream_map_reduce(source(), max_tokens, chunk_tokens, map_fn)
+        if mode == "full":
+            return _summarize_full("".join(source()), max_tokens)
+        return _summarize_stream_windowed(source(), max_tokens)
+
+    except Exception as e:
+        if source_errors:
+            raise source_errors[0]
+        return f"⚠️ Summarization error: {str(e)}"
+
+
+@traced("summarize")
+def summarize_text(text: str, max_tokens: int = 1000, mode: str = "windowed") -> str:
     """
     Summarizes large text inputs by preserving beginning and end sections based on token count.
     Ideal for condensing long files before AI processing.
@@ -12,6 +282,8 @@ def summarize_text(text: str, max_tokens: int = 1000) -> str:
     Args:
         text (str): Raw input text.
         max_tokens (int): Desired token limit for the summary.
+        mode (str): "windowed" (default) tokenizes only the ends of the text,
+            "full" tokenizes everything, "mapreduce" condenses every chunk.
 
     Returns:
         str: Concise summary or original text if already within token limits.
@@ -20,23 +292,11 @@ def summarize_text(text: str, max_tokens: int = 1000) -> str:
         return ""
 
     try:
-        tokens = ENCODER.encode(text)
-
-        if len(tokens) <= max_tokens:
-            return text  # Already within limits
-
-        half = max_tokens // 2
-        first_tokens = tokens[:half]
-        last_tokens = tokens[-half:]
-
-        first_part = ENCODER.decode(first_tokens).strip()
-        last_part = ENCODER.decode(last_tokens).strip()
-
-        return (
-            f"{first_part}\n\n"
-            f"... [Content Trimmed for Length] ...\n\n"
-            f"{last_part}"
-        )
+        if mode == "mapreduce":
+            return summarize_map_reduce(text, max_tokens)
+        if mode == "full":
+            return _summarize_full(text, max_tokens)
+        return _summarize_windowed(text, max_tokens)
 
     except Exception as e:
         return f"⚠️ Summarization error: {str(e)}"
@@ -0,0 +1,338 @@
+# backend/tracing.py
+
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration; everything below is a no-op unless TRACING_ENABLED is set
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "").lower() in {"1", "true", "yes"}
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")          # JSON lines, one per finished span
+METRICS_PATH = os.getenv("TRACE_METRICS_PATH", "")        # Prometheus text file, rewritten periodically
+METRICS_PORT = int(os.getenv("TRACE_METRICS_PORT", "0"))  # Serves /metrics when set
+METRICS_FLUSH_SECONDS = 15
+RECENT_SPAN_LIMIT = 500                                   # Kept in memory for the debug panel
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_recent = deque(maxlen=RECENT_SPAN_LIMIT)
+_durations = {}     # (span, host) -> [bucket counts..., sum, count]
+_ttfts = {}         # span -> [bucket counts..., sum, count]
+_errors = {}        # (span, host) -> count
+_stream_tokens = {}  # span -> [tokens, seconds]
+_exporters_started = False
+
+
+class _NullSpan:
+    """
+    Shared do-nothing span handed out while tracing is off.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def first_token(self):
+        pass
+
+    def add_tokens(self, count: int = 1):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    A timed stage of a request. Nested spans share the trace id of their parent.
+    """
+
+    def __init__(self, name: str, attrs: dict, activate: bool = True):
+        self.name = name
+        self.attrs = attrs
+        self.activate = activate
+        self.span_id = uuid.uuid4().hex[:16]
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = None
+        self.duration = None
+        self.ttft = None
+        self.tokens = 0
+        self.error = None
+        self._token = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        if self.activate:
+            self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if self._token is not None:
+            _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _record(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.start
+
+    def add_tokens(self, count: int = 1):
+        self.tokens += count
+
+    def to_dict(self) -> dict:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": time.time() - (time.perf_counter() - self.start),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+        }
+        if self.ttft is not None:
+            record["ttft_ms"] = round(self.ttft * 1000, 3)
+            record["tokens"] = self.tokens
+            streaming = self.duration - self.ttft
+            record["tokens_per_sec"] = round(self.tokens / streaming, 2) if streaming > 0 else None
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing one stage, e.g. `with span("research.search", query=q):`.
+    """
+    if not TRACING_ENABLED:
+        return NULL_SPAN
+    return Span(name, attrs)
+
+
+def traced(name: str):
+    """
+    Decorator wrapping every call of a function in a span.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_stream(name: str, chunks, **attrs):
+    """
+    Wraps a chunk generator, recording time-to-first-token and tokens/sec.
+    Each chunk counts as one token, which matches Groq's one-delta-per-token SSE stream.
+    """
+    if not TRACING_ENABLED:
+        return chunks
+    return _traced_stream(name, chunks, attrs)
+
+
+def _traced_stream(name: str, chunks, attrs: dict):
+    # Not activated: a generator body runs in its consumer's context between yields
+    with Span(name, attrs, activate=False) as stream_span:
+        for chunk in chunks:
+            stream_span.first_token()
+            stream_span.add_tokens()
+            yield chunk
+
+
+def _observe(table: dict, key, value: float) -> None:
+    row = table.setdefault(key, [0] * (len(DURATION_BUCKETS) + 2))
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if value <= bound:
+            row[i] += 1
+    row[-2] += value
+    row[-1] += 1
+
+
+def _record(finished: Span) -> None:
+    record = finished.to_dict()
+    key = (finished.name, str(finished.attrs.get("host", "")))
+
+    with _lock:
+        _recent.append(record)
+        _observe(_durations, key, finished.duration)
+        if finished.error:
+            _errors[key] = _errors.get(key, 0) + 1
+        if finished.ttft is not None:
+            _observe(_ttfts, finished.name, finished.ttft)
+            totals = _stream_tokens.setdefault(finished.name, [0, 0.0])
+            totals[0] += finished.tokens
+            totals[1] += max(finished.duration - finished.ttft, 0.0)
+
+    if TRACE_LOG_PATH:
+        line = json.dumps(record, default=str)
+        with _lock:
+            with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    _start_exporters()
+
+
+def recent_spans(limit: int = 100) -> list:
+    """
+    Returns the most recently finished spans, newest first.
+    """
+    with _lock:
+        return list(_recent)[-limit:][::-1]
+
+
+def _histogram_lines(metric: str, labels: str, row: list) -> list:
+    lines = []
+    for bound, count in zip(DURATION_BUCKETS, row):
+        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {row[-1]}')
+    lines.append(f"{metric}_sum{{{labels}}} {row[-2]:.6f}")
+    lines.append(f"{metric}_count{{{labels}}} {row[-1]}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """
+    Renders all collected metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        durations = {k: list(v) for k, v in _durations.items()}
+        ttfts = {k: list(v) for k, v in _ttfts.items()}
+        errors = dict(_errors)
+        stream_tokens = {k: list(v) for k, v in _stream_tokens.items()}
+
+    lines = ["# HELP robo_span_duration_seconds Time spent per pipeline stage.",
+             "# TYPE robo_span_duration_seconds histogram"]
+    for (name, host), row in sorted(durations.items()):
+        lines += _histogram_lines("robo_span_duration_seconds", f'span="{name}",host="{host}"', row)
+
+    lines += ["# HELP robo_span_errors_total Spans that ended with an exception.",
+              "# TYPE robo_span_errors_total counter"]
+    for (name, host), count in sorted(errors.items()):
+        lines.append(f'robo_span_errors_total{{span="{name}",host="{host}"}} {count}')
+
+    lines += ["# HELP robo_stream_ttft_seconds Time to first streamed token.",
+              "# TYPE robo_stream_ttft_seconds histogram"]
+    for name, row in sorted(ttfts.items()):
+        lines += _histogram_lines("robo_stream_ttft_seconds", f'span="{name}"', row)
+
+    lines += ["# HELP robo_stream_tokens_per_second Average streaming rate after the first token.",
+              "# TYPE robo_stream_tokens_per_second gauge"]
+    for name, (tokens, seconds) in sorted(stream_tokens.items()):
+        rate = tokens / seconds if seconds > 0 else 0.0
+        lines.append(f'robo_stream_tokens_per_second{{span="{name}"}} {rate:.3f}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path: str = None) -> None:
+    path = path or METRICS_PATH
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(port: int = None):
+    """
+    Serves /metrics for Prometheus scraping from a daemon thread.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Only needed when exporting
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port or METRICS_PORT), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="trace-metrics").start()
+    return server
+
+
+def _flush_metrics_forever() -> None:
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            write_metrics_file()
+        except OSError as e:
+            print(f"[Tracing Error] {e}")
+
+
+def _start_exporters() -> None:
+    """
+    Starts the configured metrics endpoint and file writer once, on the first span.
+    """
+    global _exporters_started
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if METRICS_PORT:
+        try:
+            start_metrics_server()
+        except OSError as e:
+            print(f"[Tracing Error] Metrics server not started: {e}")
+    if METRICS_PATH:
+        threading.Thread(target=_flush_metrics_forever, daemon=True, name="trace-metrics-file").start()
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list; q in [0, 100].
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(q / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies: list, wall_seconds: float) -> dict:
+    """
+    Summarizes request latencies (seconds) as p50/p95/p99, mean and throughput.
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "count": count,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "mean_ms": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+    }
@@ -0,0 +1,153 @@
+# backend/warmup.py
+#
+# Background warm-up and import-time profiling for fast cold starts.
+#   python -m backend.warmup --profile      # Per-module import cost in fresh interpreters
+
+import argparse
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1").lower() in {"1", "true", "yes"}
+
+# Heavy modules the app defers until first use, in the order worth loading them
+HEAVY_MODULES = (
+    "requests",
+    "bs4",
+    "PyPDF2",
+    "PIL.Image",
+    "pytesseract",
+    "docx2txt",
+    "agents.blackbox_agent",
+    "agents.research_agent",
+    "ai_core.llama_agent",
+    "backend.parallel_extract",
+)
+
+# App modules measured by the import profile
+APP_MODULES = (
+    "frontend.chat_ui",
+    "ai_core.agent_router",
+    "backend.file_processor",
+    "backend.summarizer",
+    "backend.memory_manager",
+    "backend.github_integration",
+) + HEAVY_MODULES
+
+_started = False
+_lock = threading.Lock()
+warmup_report = {}  # step -> seconds, or an error message
+
+
+def _timed(step: str, fn) -> None:
+    start = time.perf_counter()
+    try:
+        fn()
+        warmup_report[step] = round(time.perf_counter() - start, 3)
+    except Exception as e:
+        warmup_report[step] = f"failed: {e}"
+
+
+def _check_keys() -> None:
+    missing = [name for name in ("GROQ_API_KEY", "BLACKBOX_API_KEY") if not os.getenv(name)]
+    if missing:
+        print(f"[Warmup] Missing {', '.join(missing)}; those agents will report an error when used.")
+
+
+def warm_up() -> dict:
+    """
+    Imports the deferred heavy modules, loads the tokenizer and starts the sandbox pool.
+    Safe to call more than once; returns seconds spent per step.
+    """
+    for module in HEAVY_MODULES:
+        _timed(f"import {module}", lambda module=module: importlib.import_module(module))
+
+    from backend.summarizer import get_encoder
+    _timed("tokenizer", get_encoder)
+
+    from agents.sandbox import warm_sandbox
+    _timed("sandbox", warm_sandbox)
+
+    _check_keys()
+    return warmup_report
+
+
+def start_background_warmup() -> bool:
+    """
+    Runs warm_up() once per process on a daemon thread so the first request
+    doesn't pay for it. Streamlit re-executes app.py on every rerun; only the first call starts work.
+    """
+    global _started
+    with _lock:
+        if _started or not WARMUP_ON_START:
+            return False
+        _started = True
+    threading.Thread(target=warm_up, daemon=True, name="warmup").start()
+    return True
+
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_import(module: str, top: int = 5) -> dict:
+    """
+    Imports a module in a fresh interpreter with -X importtime and returns its
+    cumulative cost plus the most expensive dependencies it pulled in.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.getenv("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        if match.group(4) == "site":
+            entries = []  # Everything so far was interpreter start-up, not this import
+            continue
+        entries.append((int(match.group(2)), match.group(4)))
+
+    total = next((us for us, name in entries if name == module), 0)
+    heaviest = sorted((e for e in entries if e[1] != module), reverse=True)[:top]
+    return {
+        "module": module,
+        "ok": result.returncode == 0,
+        "cumulative_ms": round(total / 1000, 1),
+        "heaviest": [(name, round(us / 1000, 1)) for us, name in heaviest],
+    }
+
+
+def print_import_profile(modules=APP_MODULES, top: int = 3) -> None:
+    print(f"{'module':<30} {'cold import (ms)':>17}  heaviest dependencies")
+    for module in modules:
+        report = profile_import(module, top)
+        deps = ", ".join(f"{name} {ms}ms" for name, ms in report["heaviest"])
+        status = f"{report['cumulative_ms']:>17}" if report["ok"] else f"{'import failed':>17}"
+        print(f"{module:<30} {status}  {deps}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start tooling for the Streamlit app.")
+    parser.add_argument("--profile", action="store_true", help="Report import time per app module")
+    parser.add_argument("--warm", action="store_true", help="Run the warm-up steps and report timings")
+    parser.add_argument("--top", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.profile or not args.warm:
+        print_import_profile(top=args.top)
+    if args.warm:
+        for step, seconds in warm_up().items():
+            print(f"{step:<40} {seconds}")
+
+
+if __name__ == "__main__":
+    main()
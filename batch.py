@@ -0,0 +1,308 @@
+# batch.py
+#
+# Headless batch runner: reads JSONL jobs, runs them through the agent router
+# (or the file ingestion pipeline) at a bounded concurrency under per-upstream
+# rate limits, and appends one JSONL result per job as it finishes.
+#
+#   python batch.py jobs.jsonl --out results.jsonl --concurrency 8 --rate groq=0.5
+#
+# Job lines:
+#   {"id": "q1", "agent": "groq", "prompt": "..."}         agent: groq, blackbox or deepresearch
+#   {"id": "d1", "file": "docs/report.pdf", "max_tokens": 1000, "mode": "windowed"}
+#
+# The output file doubles as the checkpoint: rerunning the same command skips jobs
+# that already have an "ok" result there and retries the rest.
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AGENTS = ("groq", "blackbox", "deepresearch")
+SUMMARIZE_MODES = ("windowed", "mapreduce", "full")
+
+# Configurable Limits
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))   # Jobs running at once
+DEFAULT_RATES = {                                                 # Jobs started per second, per upstream; 0 = unlimited
+    "groq": float(os.getenv("BATCH_RATE_GROQ", "0.5")),
+    "blackbox": float(os.getenv("BATCH_RATE_BLACKBOX", "1")),
+    "deepresearch": float(os.getenv("BATCH_RATE_DEEPRESEARCH", "0.5")),
+}
+
+
+class Job:
+    """
+    One parsed input line. `error` is set when the line cannot be run.
+    """
+
+    __slots__ = ("id", "kind", "agent", "prompt", "file", "max_tokens", "mode", "error")
+
+    def __init__(self, line_number: int, line: str):
+        self.id = f"line-{line_number}"
+        self.kind = self.agent = self.prompt = self.file = None
+        self.max_tokens = 1000
+        self.mode = "windowed"
+        self.error = None
+        try:
+            spec = json.loads(line)
+            if not isinstance(spec, dict):
+                raise ValueError("job must be a JSON object")
+        except ValueError as e:
+            self.error = f"❌ Invalid job line: {e}"
+            return
+
+        self.id = str(spec.get("id", self.id))
+        if spec.get("file"):
+            self.kind = "file"
+            self.file = spec["file"]
+            max_tokens = spec.get("max_tokens", self.max_tokens)
+            mode = spec.get("mode", self.mode)
+            if isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens <= 0:
+                self.error = "❌ max_tokens must be a positive integer."
+            elif mode not in SUMMARIZE_MODES:
+                self.error = f"❌ mode must be one of {', '.join(SUMMARIZE_MODES)}."
+            else:
+                self.max_tokens, self.mode = max_tokens, mode
+        elif spec.get("agent") in AGENTS and isinstance(spec.get("prompt"), str):
+            self.kind = self.agent = spec["agent"]
+            self.prompt = spec["prompt"]
+        else:
+            self.error = f"❌ Job needs a file, or an agent ({', '.join(AGENTS)}) and a prompt."
+
+    def describe(self) -> dict:
+        if self.kind == "file":
+            return {"id": self.id, "kind": "file", "file": self.file}
+        return {"id": self.id, "kind": self.kind or "invalid"}
+
+
+def iter_jobs(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield Job(line_number, line)
+
+
+def load_checkpoint(path: str) -> set:
+    """
+    Ids of jobs with an "ok" result in an earlier run's output. A line cut short
+    by an interrupted run is ignored, so that job runs again.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def parse_rates(values: list) -> dict:
+    rates = dict(DEFAULT_RATES)
+    for value in values or []:
+        upstream, _, rate = value.partition("=")
+        if upstream not in rates or not rate:
+            raise argparse.ArgumentTypeError(f"--rate expects one of {', '.join(rates)} as NAME=PER_SECOND")
+        rates[upstream] = float(rate)
+    return rates
+
+
+def run_agent(job: Job, bypass_cache: bool) -> tuple:
+    """
+    Runs a prompt through the router's event stream.
+
+    Returns:
+        tuple: (ok, result text, time to first token in seconds or None)
+    """
+    from ai_core.agent_router import iter_events
+    from ai_core.events import TOKEN, ERROR, DONE
+    from backend.memory_manager import clear_session
+
+    session_id = f"batch-{job.id}"  # Keeps Groq context from leaking between jobs
+    start = time.perf_counter()
+    ttft = None
+    failed = False
+    result = ""
+    try:
+        for event in iter_events(job.agent, job.prompt, bypass_cache, session_id):
+            if event.type == TOKEN and ttft is None:
+                ttft = time.perf_counter() - start
+            elif event.type == ERROR and not event.url:
+                failed = True  # Errors for single research sources still leave a usable answer
+            elif event.type == DONE:
+                result = event.text
+    finally:
+        clear_session(session_id)
+    return not failed, result, ttft
+
+
+def run_file(job: Job) -> tuple:
+    from backend.file_processor import LocalFile
+    from backend.ingest import ingest_file
+
+    text = ingest_file(LocalFile(job.file), max_tokens=job.max_tokens, mode=job.mode)
+    return not text.startswith(("⚠️", "❌")), text, None
+
+
+class BatchRunner:
+    """
+    Runs jobs on a thread pool and writes each result line as soon as it is ready.
+    At most 2 * concurrency jobs are read ahead, so inputs of any size stream through.
+    """
+
+    def __init__(self, out, concurrency: int, rates: dict, bypass_cache: bool = False):
+        from backend.rate_limit import TokenBucket
+
+        self.out = out
+        self.concurrency = concurrency
+        self.bypass_cache = bypass_cache
+        self.buckets = {
+            upstream: TokenBucket(rate, max(1.0, rate)) for upstream, rate in rates.items() if rate > 0
+        }
+        self.latencies = {}  # kind -> seconds per finished job
+        self.ttfts = {}      # kind -> seconds to first token, for streaming agents
+        self.counts = {"ok": 0, "error": 0, "skipped": 0}
+        self._slots = threading.BoundedSemaphore(2 * concurrency)
+        self._lock = threading.Lock()
+
+    def run(self, jobs, done_ids: set) -> float:
+        """
+        Runs every job not in done_ids. Returns the wall time in seconds.
+        """
+        wall_start = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            for job in jobs:
+                if job.id in done_ids:
+                    self.counts["skipped"] += 1
+                    continue
+                self._slots.acquire()
+                pool.submit(self._run_one, job)
+        except KeyboardInterrupt:
+            print("\n[Batch] Interrupted; waiting for running jobs. Finished results are skipped on resume.")
+            pool.shutdown(wait=False, cancel_futures=True)
+        finally:
+            # Jobs already running still write their results before the output is closed
+            pool.shutdown(wait=True)
+        return time.perf_counter() - wall_start
+
+    def _run_one(self, job: Job) -> None:
+        try:
+            record = job.describe()
+            start = time.perf_counter()
+            ok, result, ttft = False, job.error, None
+            if job.error is None:
+                bucket = self.buckets.get(job.agent)
+                if bucket is not None:
+                    bucket.acquire()
+                    start = time.perf_counter()  # Latency excludes time spent waiting for the rate limit
+                try:
+                    if job.kind == "file":
+                        ok, result, ttft = run_file(job)
+                    else:
+                        ok, result, ttft = run_agent(job, self.bypass_cache)
+                except Exception as e:
+                    result = f"❌ Unexpected error: {str(e)}"
+            elapsed = time.perf_counter() - start
+
+            record.update({
+                "status": "ok" if ok else "error",
+                "result": result,
+                "latency_ms": round(elapsed * 1000, 2),
+                "ttft_ms": round(ttft * 1000, 2) if ttft is not None else None,
+            })
+            self._record(record, job.kind if job.error is None else None, elapsed, ttft, ok)
+        finally:
+            self._slots.release()
+
+    def _record(self, record: dict, kind: str, elapsed: float, ttft, ok: bool) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.out.write(line)
+            self.out.flush()
+            self.counts["ok" if ok else "error"] += 1
+            if kind is None:
+                return  # Invalid lines never ran
+            self.latencies.setdefault(kind, []).append(elapsed)
+            if ttft is not None:
+                self.ttfts.setdefault(kind, []).append(ttft)
+
+    def report(self, wall_seconds: float) -> dict:
+        from backend.tracing import latency_summary
+
+        with self._lock:
+            report = {"wall_seconds": round(wall_seconds, 2), **self.counts}
+            every = [seconds for latencies in self.latencies.values() for seconds in latencies]
+            report["all"] = latency_summary(every, wall_seconds)
+            for kind, latencies in self.latencies.items():
+                report[kind] = latency_summary(latencies, wall_seconds)
+                if self.ttfts.get(kind):
+                    ttft_report = latency_summary(self.ttfts[kind], wall_seconds)
+                    report[kind]["ttft_p50_ms"] = ttft_report["p50_ms"]
+                    report[kind]["ttft_p95_ms"] = ttft_report["p95_ms"]
+        return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{report['ok']} ok · {report['error']} failed · {report['skipped']} skipped (already done) "
+        f"in {report['wall_seconds']}s"
+    )
+    columns = ("count", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "throughput_rps", "ttft_p50_ms")
+    print(f"{'kind':<14}" + "".join(f"{c:>15}" for c in columns))
+    for name, summary in report.items():
+        if isinstance(summary, dict):
+            print(f"{name:<14}" + "".join(f"{str(summary.get(c, '-')):>15}" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run JSONL prompt and document jobs through the agents without the UI.")
+    parser.add_argument("jobs", help="JSONL file with one job per line")
+    parser.add_argument("--out", help="JSONL results, also the resume checkpoint (default: <jobs>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", action="append", metavar="UPSTREAM=PER_SECOND",
+                        help="Jobs started per second for groq, blackbox or deepresearch; 0 = unlimited. Repeatable")
+    parser.add_argument("--restart", action="store_true", help="Discard earlier results instead of resuming")
+    parser.add_argument("--bypass-cache", action="store_true", help="Skip the response cache")
+    parser.add_argument("--report", help="Also write the final report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        rates = parse_rates(args.rate)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    out_path = args.out or f"{os.path.splitext(args.jobs)[0]}.results.jsonl"
+    done_ids = set() if args.restart else load_checkpoint(out_path)
+    if done_ids:
+        print(f"[Batch] Resuming: {len(done_ids)} jobs already done in {out_path}")
+
+    with open(out_path, "w" if args.restart else "a", encoding="utf-8") as out:
+        if out.tell() and not _ends_with_newline(out_path):
+            out.write("\n")  # Close a line cut short by an interrupted run
+        runner = BatchRunner(out, max(1, args.concurrency), rates, args.bypass_cache)
+        wall = runner.run(iter_jobs(args.jobs), done_ids)
+
+    report = runner.report(wall)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_summarizer.py
+#
+# Compares summarize_text strategies on large synthetic documents:
+#   python -m benchmarks.bench_summarizer --sizes 1 4 16 --repeat 3
+
+import argparse
+import random
+import time
+
+from backend.summarizer import summarize_text
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog research results indicate significant "
+    "improvement across multiple benchmarks while latency remains bounded under load "
+    "tokenizer window summary document section table figure appendix"
+).split()
+
+
+def make_document(megabytes: float, seed: int = 7) -> str:
+    """
+    Builds a pseudo-natural document of roughly the requested size with paragraph breaks.
+    """
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    paragraphs = []
+    size = 0
+    while size < target:
+        sentence_count = rng.randint(3, 8)
+        paragraph = " ".join(
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+            for _ in range(sentence_count)
+        )
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def time_call(fn, repeat: int) -> tuple:
+    """
+    Returns (best seconds, last result) over `repeat` runs.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summarize_text modes on large inputs.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="Document sizes in MB")
+    parser.add_argument("--max-tokens", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'mode':>10} {'best (ms)':>12} {'speedup':>9}  output")
+    for megabytes in args.sizes:
+        text = make_document(megabytes)
+        baseline, full_result = time_call(lambda: summarize_text(text, args.max_tokens, mode="full"), args.repeat)
+        print(f"{megabytes:>6.1f}MB {'full':>10} {baseline * 1000:>12.1f} {1.0:>8.1f}x  {len(full_result)} chars")
+
+        for mode in ("windowed", "mapreduce"):
+            seconds, result = time_call(lambda: summarize_text(text, args.max_tokens, mode=mode), args.repeat)
+            note = f"{len(result)} chars"
+            if mode == "windowed":
+                note += ", identical to full" if result == full_result else ", DIFFERS from full"
+            print(f"{megabytes:>6.1f}MB {mode:>10} {seconds * 1000:>12.1f} {baseline / seconds:>8.1f}x  {note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/harness.py
+#
+# Offline load harness: starts the local stub upstreams, points the app at them
+# and drives the real code paths at a chosen concurrency.
+#
+#   python -m benchmarks.harness --scenario groq --requests 200 --concurrency 16
+#   python -m benchmarks.harness --scenario all --token-rate 800 --json results.json
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_servers import start_stub_server, upstream_env
+
+SCENARIOS = ("groq", "blackbox", "deepresearch", "github", "file", "summarize")
+
+
+def configure_environment(base_url: str, use_caches: bool) -> None:
+    """
+    Must run before the app modules are imported: they read their settings at import time.
+    """
+    os.environ.update(upstream_env(base_url))
+    if not use_caches:
+        os.environ["RESPONSE_CACHE_DB"] = ""
+        for agent in ("GROQ", "BLACKBOX", "DEEPRESEARCH"):
+            os.environ[f"RESPONSE_CACHE_TTL_{agent}"] = "0"
+        os.environ["GITHUB_CACHE_TTL"] = "0"
+        os.environ["RESEARCH_PAGE_CACHE_DB"] = ""
+
+
+def build_scenarios(args) -> dict:
+    """
+    Imports the app lazily and returns scenario name -> fn(index) -> (ok, ttft seconds or None).
+    """
+    from ai_core.agent_router import route_message
+    from backend.file_processor import LocalFile
+    from backend.ingest import ingest_file
+    from backend.github_integration import get_github_profile, get_pull_requests
+    from backend.summarizer import summarize_text
+    from benchmarks.bench_summarizer import make_document
+
+    workdir = tempfile.mkdtemp(prefix="robo-bench-")
+    document = make_document(args.document_mb)
+
+    def groq(index):
+        start = time.perf_counter()
+        ttft = None
+        text = []
+        for chunk in route_message("groq", f"benchmark question {index}"):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            text.append(chunk)
+        reply = "".join(text)
+        return not reply.startswith("[Groq API Error"), ttft
+
+    def blackbox(index):
+        result = route_message("blackbox", f"write a loop {index}")
+        return not result.startswith(("❌", "⚠️")), None
+
+    def deepresearch(index):
+        result = route_message("deepresearch", f"benchmark topic {index}")
+        return result.startswith("**Summary"), None
+
+    def github(index):
+        username = f"user{index % args.github_users}"
+        profile = get_github_profile(username)
+        get_pull_requests(username)
+        return profile.get("name") == username, None
+
+    def file(index):
+        path = os.path.join(workdir, f"doc-{index}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(document)
+            f.write(f"\n\nDocument {index}")  # Unique content so the extraction cache can't hide work
+        text = ingest_file(LocalFile(path))  # Same streaming extract-and-summarize path as the UI
+        os.remove(path)
+        return not text.startswith(("⚠️ Error", "❌")), None
+
+    def summarize(index):
+        return bool(summarize_text(document + str(index), mode=args.summarize_mode)), None
+
+    return {
+        "groq": groq,
+        "blackbox": blackbox,
+        "deepresearch": deepresearch,
+        "github": github,
+        "file": file,
+        "summarize": summarize,
+    }
+
+
+def run_load(fn, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    Calls fn(index) `requests` times across `concurrency` threads and summarizes latency.
+    """
+    from backend.tracing import latency_summary
+
+    for index in range(warmup):
+        fn(-1 - index)
+
+    latencies, ttfts = [], []
+    failures = 0
+    lock = threading.Lock()
+
+    def one(index):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            ok, ttft = fn(index)
+        except Exception as e:
+            print(f"[Benchmark Error] {e}")
+            ok, ttft = False, None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if ttft is not None:
+                ttfts.append(ttft)
+            if not ok:
+                failures += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - wall_start
+
+    report = latency_summary(latencies, wall)
+    report["failures"] = failures
+    if ttfts:
+        ttft_report = latency_summary(ttfts, wall)
+        report["ttft_p50_ms"] = ttft_report["p50_ms"]
+        report["ttft_p95_ms"] = ttft_report["p95_ms"]
+    return report
+
+
+def print_report(results: dict) -> None:
+    columns = ("count", "failures", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "throughput_rps", "ttft_p50_ms")
+    print(f"{'scenario':<14}" + "".join(f"{c:>15}" for c in columns))
+    for name, report in results.items():
+        print(f"{name:<14}" + "".join(f"{str(report.get(c, '-')):>15}" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent pipeline against local stub upstreams.")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--use-caches", action="store_true", help="Leave response and GitHub caches enabled")
+    parser.add_argument("--token-rate", type=float, default=400.0, help="Stub Groq tokens per second")
+    parser.add_argument("--ttft", type=float, default=0.15, help="Stub Groq time to first token")
+    parser.add_argument("--slow-article", type=float, default=3.0, help="Seconds for slow article pages")
+    parser.add_argument("--article-hosts", type=int, default=32,
+                        help="Distinct hosts article pages are served from; 1 puts every fetch behind one per-host limit")
+    parser.add_argument("--github-rate-limit", type=int, default=5000)
+    parser.add_argument("--github-users", type=int, default=5, help="Distinct usernames cycled through")
+    parser.add_argument("--document-mb", type=float, default=1.0, help="Size of file/summarize documents")
+    parser.add_argument("--summarize-mode", default="windowed")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub_server({
+        "groq_token_rate": args.token_rate,
+        "groq_ttft": args.ttft,
+        "slow_article_latency": args.slow_article,
+        "article_hosts": args.article_hosts,
+        "github_rate_limit": args.github_rate_limit,
+    })
+    configure_environment(base_url, args.use_caches)
+    scenarios = build_scenarios(args)
+
+    names = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    results = {}
+    for name in names:
+        results[name] = run_load(scenarios[name], args.requests, args.concurrency, args.warmup)
+
+    print_report(results)
+    print(f"\nUpstream requests served: {state.requests}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results, "upstream_requests": state.requests}, f, indent=2)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# benchmarks/stub_servers.py
+#
+# Local stand-ins for every upstream the app talks to, served from one threaded
+# HTTP server under path prefixes. Search results spread their article links over
+# extra listeners on their own ports, so the research agent's per-host fetch limit
+# behaves as it does against many real sites.
+#   POST /groq/chat/completions       Groq-style SSE stream at a configurable token rate
+#   POST /blackbox/chat/completions   Blackbox-style JSON completion, or an SSE stream when requested
+#   GET  /ddg/html/?q=...             DuckDuckGo HTML results linking to fast and slow articles
+#   GET  /article/{fast,slow}/<n>     Article pages with <p> text
+#   GET  /github/...                  GitHub REST mock with ETag, Link and rate-limit headers
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_CONFIG = {
+    "groq_ttft": 0.15,           # Seconds before the first token
+    "groq_tokens": 120,          # Tokens per streamed answer
+    "groq_token_rate": 400.0,    # Tokens per second after the first
+    "blackbox_latency": 0.4,     # Seconds per completion
+    "search_latency": 0.1,       # Seconds per results page
+    "search_results": 6,         # Links per results page, alternating fast/slow
+    "fast_article_latency": 0.05,
+    "slow_article_latency": 3.0,
+    "article_paragraphs": 40,
+    "article_hosts": 32,         # Distinct host:port origins article links are spread over
+    "github_latency": 0.05,
+    "github_rate_limit": 5000,   # Requests per window before 403s
+    "github_rate_window": 3600,  # Seconds until the limit resets
+    "github_items": 95,          # Repos / PRs per user, served 30 per page
+}
+
+ARTICLE_SENTENCE = (
+    "Benchmarks measure latency under realistic load, and this paragraph stands in for "
+    "article text that the research agent extracts and summarizes. "
+)
+
+
+class StubState:
+    """
+    Shared mutable state for the stub server: configuration and GitHub quota.
+    """
+
+    def __init__(self, config: dict):
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.lock = threading.Lock()
+        self.github_remaining = self.config["github_rate_limit"]
+        self.github_reset = time.time() + self.config["github_rate_window"]
+        self.requests = {}
+        self.article_hosts = []  # Base URLs of the article listeners, set in start_stub_server
+
+    def count(self, route: str) -> None:
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def take_github_quota(self) -> tuple:
+        with self.lock:
+            now = time.time()
+            if now >= self.github_reset:
+                self.github_remaining = self.config["github_rate_limit"]
+                self.github_reset = now + self.config["github_rate_window"]
+            allowed = self.github_remaining > 0
+            if allowed:
+                self.github_remaining -= 1
+            return allowed, self.github_remaining, int(self.github_reset)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so the pooled client is exercised
+    state = None                   # Set per server in start_stub_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client closed a stream early
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: dict = None) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self._read_body()
+        if path == "/groq/chat/completions":
+            self.state.count("groq")
+            return self._groq_stream(body)
+        if path == "/blackbox/chat/completions":
+            self.state.count("blackbox")
+            return self._blackbox(body)
+        self._send_json(404, {"error": "not found"})
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path.startswith("/ddg/html"):
+            self.state.count("search")
+            return self._search(parse_qs(parts.query).get("q", [""])[0])
+        if parts.path.startswith("/article/"):
+            self.state.count("article")
+            return self._article(parts.path)
+        if parts.path.startswith("/github/"):
+            self.state.count("github")
+            return self._github(parts.path[len("/github"):], parse_qs(parts.query))
+        self._send_json(404, {"error": "not found"})
+
+    def _groq_stream(self, body: dict) -> None:
+        config = self.state.config
+        stream = body.get("stream", False)
+        time.sleep(config["groq_ttft"])
+        words = [f"tok{i} " for i in range(config["groq_tokens"])]
+
+        if not stream:
+            message = {"role": "assistant", "content": "".join(words)}
+            return self._send_json(200, {"choices": [{"message": message}]})
+
+        # Chunked transfer encoding, one SSE event per chunk, as the real API streams
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = 1.0 / config["groq_token_rate"] if config["groq_token_rate"] > 0 else 0
+        for i, word in enumerate(words):
+            if i and delay:
+                time.sleep(delay)
+            event = {"choices": [{"delta": {"content": word}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _blackbox(self, body: dict) -> None:
+        time.sleep(self.state.config["blackbox_latency"])
+        prompt = (body.get("messages") or [{}])[-1].get("content", "")
+        code = f"# Suggestion for: {prompt[:40]}\nfor i in range(3):\n    print(i)"
+        if not body.get("stream"):
+            return self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": code}}]})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in code.splitlines(keepends=True):
+            event = {"choices": [{"delta": {"content": line}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _search(self, query: str) -> None:
+        config = self.state.config
+        time.sleep(config["search_latency"])
+        hosts = self.state.article_hosts or [f"http://{self.headers.get('Host')}"]
+        seed = int(hashlib.sha256(query.encode("utf-8")).hexdigest()[:6], 16)
+        links = []
+        for i in range(config["search_results"]):
+            speed = "fast" if i % 2 == 0 else "slow"
+            host = hosts[(seed + i) % len(hosts)]
+            links.append(
+                f'<div class="result"><a class="result__a" href="{host}/article/{speed}/{seed + i}">'
+                f"Result {i} for {query}</a></div>"
+            )
+        html = f"<html><body>{''.join(links)}</body></html>"
+        self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _article(self, path: str) -> None:
+        config = self.state.config
+        _, _, speed, article_id = path.split("/", 3)
+        time.sleep(config["slow_article_latency"] if speed == "slow" else config["fast_article_latency"])
+        paragraphs = "".join(
+            f"<p>Article {article_id}, paragraph {i}. {ARTICLE_SENTENCE}</p>"
+            for i in range(config["article_paragraphs"])
+        )
+        html = f"<html><head><title>{article_id}</title></head><body><nav>menu</nav>{paragraphs}</body></html>"
+        self._send(200, html.encode("utf-8"), "text/html; charset=utf-8", {"Cache-Control": "max-age=600"})
+
+    def _github(self, path: str, query: dict) -> None:
+        config = self.state.config
+        time.sleep(config["github_latency"])
+
+        if path.startswith("/users/") and path.endswith("/repos"):
+            username = path.split("/")[2]
+            items = [{"name": f"{username}-repo-{i}", "html_url": f"https://github.com/{username}/repo-{i}"}
+                     for i in range(config["github_items"])]
+            payload, link = self._paginate(path, query, items)
+        elif path.startswith("/users/"):
+            username = path.split("/")[2]
+            payload, link = {"login": username, "avatar_url": "", "bio": f"{username} (stub)"}, None
+        elif path == "/search/issues":
+            author = query.get("q", [""])[0].split("author:")[-1].split(" ")[0].split("+")[0]
+            items = [{"title": f"PR {i} by {author}", "html_url": f"https://github.com/pr/{i}",
+                      "state": "open" if i % 3 else "closed"}
+                     for i in range(config["github_items"])]
+            page_items, link = self._paginate(path, query, items)
+            payload = {"total_count": len(items), "items": page_items}
+        else:
+            return self._send_json(404, {"message": "Not Found"})
+
+        body = json.dumps(payload).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        headers = {"ETag": etag, "X-RateLimit-Limit": str(config["github_rate_limit"])}
+        if link:
+            headers["Link"] = link
+
+        # Conditional hits are free, as on the real API
+        if self.headers.get("If-None-Match") == etag:
+            headers["X-RateLimit-Remaining"] = str(self.state.github_remaining)
+            headers["X-RateLimit-Reset"] = str(int(self.state.github_reset))
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        allowed, remaining, reset = self.state.take_github_quota()
+        headers["X-RateLimit-Remaining"] = str(remaining)
+        headers["X-RateLimit-Reset"] = str(reset)
+        if not allowed:
+            headers["Retry-After"] = str(max(1, reset - int(time.time())))
+            return self._send_json(403, {"message": "API rate limit exceeded"}, headers)
+
+        self._send(200, body, "application/json", headers)
+
+    def _paginate(self, path: str, query: dict, items: list) -> tuple:
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        last = max(1, -(-len(items) // per_page))
+        start = (page - 1) * per_page
+        host = f"http://{self.headers.get('Host')}/github"
+
+        def page_url(number):
+            params = {k: v[0] for k, v in query.items()}
+            params["page"] = str(number)
+            params["per_page"] = str(per_page)
+            return f"{host}{path}?" + "&".join(f"{k}={v}" for k, v in params.items())
+
+        links = []
+        if page < last:
+            links.append(f'<{page_url(page + 1)}>; rel="next"')
+            links.append(f'<{page_url(last)}>; rel="last"')
+        if page > 1:
+            links.append(f'<{page_url(1)}>; rel="first"')
+            links.append(f'<{page_url(page - 1)}>; rel="prev"')
+        return items[start:start + per_page], ", ".join(links) or None
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    The main stub listener. Shutting it down also stops its article listeners.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        self.article_servers = []
+
+    def shutdown(self):
+        for server in self.article_servers:
+            server.shutdown()
+        super().shutdown()
+
+
+def _serve(server: ThreadingHTTPServer, name: str) -> str:
+    threading.Thread(target=server.serve_forever, daemon=True, name=name).start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def start_stub_server(config: dict = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Starts the stub server, and config["article_hosts"] article listeners on free
+    ports, on daemon threads.
+
+    Returns:
+        tuple: (server, base_url, state)
+    """
+    state = StubState(config or {})
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = StubServer((host, port), handler)
+    for _ in range(state.config["article_hosts"]):
+        article_server = StubServer((host, 0), handler)
+        server.article_servers.append(article_server)
+        state.article_hosts.append(_serve(article_server, "stub-articles"))
+    base_url = _serve(server, "stub-upstreams")
+    return server, base_url, state
+
+
+def upstream_env(base_url: str) -> dict:
+    """
+    Environment variables that point every agent at the stub server.
+    """
+    return {
+        "GROQ_API_URL": f"{base_url}/groq/chat/completions",
+        "BLACKBOX_API_URL": f"{base_url}/blackbox/chat/completions",
+        "DUCKDUCKGO_URL": f"{base_url}/ddg/html/",
+        "GITHUB_API_URL": f"{base_url}/github",
+        "GROQ_API_KEY": "stub-groq-key",
+        "BLACKBOX_API_KEY": "stub-blackbox-key",
+    }
@@ -1,38 +1,58 @@
+import os
+import uuid
 import streamlit as st
-from backend.github_integration import get_github_profile, get_pull_requests
-from backend.memory_manager import get_chat_memory, add_to_memory, conversation_history
-from ai_core.agent_router import route_message
-from backend.file_processor import process_file
-from backend.summarizer import summarize_text
+from backend.github_integration import (
+    PER_PAGE, get_github_profile, iter_repositories, iter_pull_requests, get_cache_stats,
+)
+from backend.memory_manager import get_chat_memory, add_to_memory, add_to_history, clear_session
+from ai_core.agent_router import route_message, route_concurrent, iter_events
+from ai_core.events import SOURCE, PARTIAL, ERROR, DONE
+from backend.ingest import ingest_and_index
+from backend.doc_index import build_prompt
+from backend.tracing import traced
+from frontend.debug_panel import render_debug_panel
+from frontend.stream_renderer import render_stream
+from frontend.transcript import get_transcript, render_transcript, render_memory
+
+SIDEBAR_LIST_LIMIT = int(os.getenv("GITHUB_SIDEBAR_ITEMS", "20"))  # Repos / PRs shown before "Show all"
+
+
+def get_session_id() -> str:
+    """
+    Stable id for this browser session's memory. Kept in the URL so that a
+    reconnect or page reload resumes the same conversation.
+    """
+    if "session_id" not in st.session_state:
+        session_id = st.query_params.get("sid") or uuid.uuid4().hex
+        st.session_state.session_id = session_id
+        st.query_params["sid"] = session_id
+    return st.session_state.session_id
 
 
 def render_chat_ui():
     col1, col2, col3 = st.columns([2, 6, 2])
+    session_id = get_session_id()
 
     # Chat Memory Sidebar
     with col1:
         st.header("🗂️ Chat Memory")
 
-        memory = get_chat_memory()
-        for idx, msg in enumerate(memory[-50:], 1):
-            st.write(f"{idx}. {msg}")
+        render_memory(get_chat_memory(session_id))
 
         if st.button("🗑️ Clear Memory"):
-            conversation_history.clear()
-            st.session_state.conversation = []
+            clear_session(session_id)
+            get_transcript().clear()
             st.session_state.chat_memory = []
             st.rerun()
 
+        render_debug_panel()
+
     # Main Chat Interface
     with col2:
         st.header("💬 AI Chat")
 
-        if "conversation" not in st.session_state:
-            st.session_state.conversation = []
-
-        for msg in st.session_state.conversation:
-            icon = "🧑" if msg["role"] == "user" else "🤖"
-            st.markdown(f"{icon} **{msg['role'].capitalize()}:** {msg['content']}")
+        # Only the latest messages are rendered; older ones are paged in on demand
+        render_transcript(get_transcript())
 
         user_input = st.chat_input("Ask me anything...")
 
@@ -43,18 +63,21 @@ def render_chat_ui():
 
         if uploaded_file:
             st.info(f"📂 Processing: {uploaded_file.name}")
-            file_text = process_file(uploaded_file)
-
-            if len(file_text) > 5000:
-                st.warning("Large file detected, summarizing...")
-                file_text = summarize_text(file_text)
+            progress = st.progress(0.0, text="Extracting text...")
+            # Extracted and summarized chunk by chunk; text over 5000 characters comes back summarized
+            file_text, index = ingest_and_index(uploaded_file, on_progress=lambda fraction: progress.progress(fraction))
+            progress.empty()
+            # Later questions are sent with the most relevant chunks of the full document
+            st.session_state.doc_index = index
 
             st.success("File processed.")
             display_ai_response(file_text)
+        else:
+            st.session_state.doc_index = None  # The document was removed; stop adding its excerpts
 
         if user_input:
-            add_to_memory(user_input)
-            display_ai_response(user_input)
+            add_to_memory(user_input, session_id)
+            display_ai_response(user_input, build_prompt(user_input, st.session_state.get("doc_index")))
 
     # GitHub Sidebar with Login
     with col3:
@@ -68,14 +91,12 @@ def render_chat_ui():
 
         if github_username:
             st.session_state.github_user = github_username
-            profile = get_github_profile(github_username)
-            prs = get_pull_requests(github_username)
-        else:
-            profile = get_github_profile()
-            prs = get_pull_requests()
+        username = github_username or None
+        profile = get_github_profile(username)
 
         token_present = bool(st.secrets.get("GITHUB_API_KEY"))
         st.caption(f"🔑 GitHub Token Loaded: {'✅' if token_present else '❌ Not Set'}")
+        cache_area = st.empty()
 
         if profile:
             avatar_url = profile.get("avatar_url", "")
@@ -84,51 +105,127 @@ def render_chat_ui():
             st.write(f"**{profile.get('name', 'N/A')}**")
             st.caption(profile.get("bio", "No bAio provided."))
 
-            st.subheader("📁 Recent Repositories")
-            for repo in profile.get("repos", []):
-                st.write(f"[{repo.get('name', 'Repo')}]({repo.get('html_url', '')})")
+            # The first items show by default; "Show all" fetches the remaining pages in parallel
+            st.subheader("📁 Repositories")
+            render_pages(
+                iter_repositories(username),
+                lambda repo: f"- [{repo.get('name', 'Repo')}]({repo.get('html_url', '')})",
+                key="github_all_repos",
+            )
 
             st.subheader("🔧 Pull Requests")
-            for pr in prs:
-                st.write(f"[{pr.get('title', '')}]({pr.get('html_url', '')}) - **{pr.get('state', '')}**")
+            render_pages(
+                iter_pull_requests(username),
+                lambda pr: f"- [{pr.get('title', '')}]({pr.get('html_url', '')}) - **{pr.get('state', '')}**",
+                key="github_all_prs",
+            )
+
+        cache_stats = get_cache_stats()
+        cache_area.caption(
+            f"🗃️ GitHub Cache: {cache_stats['hits']} hits · {cache_stats['revalidated']} revalidated · "
+            f"{cache_stats['misses']} misses · {cache_stats['coalesced']} shared · {cache_stats['stale']} served stale"
+        )
 
 
-def display_ai_response(prompt):
+def render_pages(pages, format_item, key: str, limit: int = SIDEBAR_LIST_LIMIT):
+    """
+    Renders the first `limit` items of a paginated list, without fetching later
+    pages. While the "Show all" toggle under `key` is on, every page is rendered
+    as it arrives, one markdown block per page, with a running count underneath.
+    """
+    container = st.container()
+    count_area = st.empty()
+    count_area.caption("⏳ Loading...")
+    show_all = st.session_state.get(key, False)
+    total = 0
+    more = False
+    try:
+        for items in pages:
+            if not show_all and total + len(items) >= limit:
+                more = total + len(items) > limit or len(items) == PER_PAGE
+                items = items[:limit - total]
+            if items:
+                container.markdown("\n".join(format_item(item) for item in items))
+            total += len(items)
+            if not show_all and total >= limit:
+                break
+            count_area.caption(f"⏳ {total} loaded...")
+    finally:
+        pages.close()
+
+    if show_all or more:
+        count_area.caption(f"{total} total" if show_all else f"First {total} shown")
+        st.toggle("Show all", key=key)
+    else:
+        count_area.caption(f"{total} total" if total else "None found.")
+
+
+@traced("ui.response")
+def display_ai_response(prompt, model_prompt=None):
     """
     Unified AI Response Pipeline:
     - If prompt starts with 'research:', use deep research agent
     - Otherwise, use Groq for streaming + Blackbox for code + optional execution
+
+    model_prompt, when given, is what the models receive instead of the displayed
+    prompt, e.g. the prompt with retrieved document excerpts.
     """
-    st.session_state.conversation.append({"role": "user", "content": prompt})
+    session_id = get_session_id()
+    transcript = get_transcript()
+    transcript.append("user", prompt)
     st.chat_message("user").write(prompt)
 
     with st.chat_message("assistant"):
         if prompt.lower().strip().startswith("research:"):
-            st.markdown("🔎 **Conducting Deep Research...**")
+            status = st.status("🔎 **Conducting Deep Research...**", expanded=True)
             research_prompt = prompt.replace("research:", "", 1).strip()
-            result = route_message("deepresearch", research_prompt)
+            result = ""
+            # Show each source as it is found and each summary as soon as it is ready
+            for event in iter_events("deepresearch", research_prompt):
+                if event.type == SOURCE:
+                    status.write(f"🔗 {event.url}")
+                elif event.type == PARTIAL:
+                    status.markdown(f"**{event.url}**\n\n{event.text}")
+                elif event.type == ERROR and event.url:
+                    status.caption(f"{event.text} {event.url}")
+                elif event.type == DONE:
+                    result = event.text
+            status.update(label="🔎 Research complete", state="complete", expanded=False)
             st.markdown(result)
-            st.session_state.conversation.append({"role": "assistant", "content": result})
+            transcript.append("assistant", result)
             return
 
-        # Standard Groq + Blackbox response
-        streamed_reply = ""
+        # Standard Groq + Blackbox response, both requested at once
         response_area = st.empty()
 
-        for chunk in route_message("groq", prompt):
-            streamed_reply += chunk
-            response_area.markdown(streamed_reply)
+        st.divider()
+
+        suggestion_expander = st.expander("💡 Blackbox Code Suggestion")
+        suggestion_area = suggestion_expander.empty()
+        suggestion_area.caption("⏳ Waiting for Blackbox...")
 
-        st.session_state.conversation.append({"role": "assistant", "content": streamed_reply})
-        conversation_history.append({"role": "user", "content": prompt})
-        conversation_history.append({"role": "assistant", "content": streamed_reply})
+        # Only the plain prompt enters the session history; excerpts go with this request alone
+        groq_stream, blackbox_future = route_concurrent(prompt, session_id=session_id, model_prompt=model_prompt)
+        suggestion = None
 
-        st.divider()
+        def poll_blackbox():
+            # Fill the expander as soon as Blackbox answers, without pausing the stream
+            nonlocal suggestion
+            if suggestion is None and blackbox_future.done():
+                suggestion = blackbox_future.result()
+                suggestion_area.code(suggestion, language="python")
+
+        streamed_reply = render_stream(groq_stream, response_area, on_chunk=poll_blackbox)
+
+        transcript.append("assistant", streamed_reply)
+        # The user turn was already recorded by the Groq agent
+        add_to_history("assistant", streamed_reply, session_id)
 
-        with st.expander("💡 Blackbox Code Suggestion"):
-            suggestion = route_message("blackbox", prompt)
-            st.code(suggestion, language="python")
+        if suggestion is None:
+            suggestion = blackbox_future.result()
+            suggestion_area.code(suggestion, language="python")
 
+        with suggestion_expander:
             with st.expander("⚡ Execute Suggested Code"):
                 output = route_message("blackbox_exec", suggestion)
                 st.text_area("Execution Output", output, height=150)
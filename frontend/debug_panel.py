@@ -0,0 +1,37 @@
+import os
+import streamlit as st
+from backend import tracing
+
+SHOW_DEBUG_PANEL = os.getenv("TRACE_DEBUG_PANEL", "").lower() in {"1", "true", "yes"}
+
+
+def render_debug_panel():
+    """
+    Optional sidebar panel listing recent trace spans and stream timings.
+    Shown only when both TRACING_ENABLED and TRACE_DEBUG_PANEL are set.
+    """
+    if not (tracing.TRACING_ENABLED and SHOW_DEBUG_PANEL):
+        return
+
+    with st.expander("🧭 Trace Debug"):
+        spans = tracing.recent_spans(limit=50)
+        if not spans:
+            st.caption("No spans recorded yet.")
+            return
+
+        rows = [
+            {
+                "span": record["name"],
+                "ms": record["duration_ms"],
+                "ttft ms": record.get("ttft_ms"),
+                "tok/s": record.get("tokens_per_sec"),
+                "host": record["attrs"].get("host", ""),
+                "trace": record["trace_id"][:8],
+                "error": record.get("error", ""),
+            }
+            for record in spans
+        ]
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+        st.caption("Prometheus Metrics")
+        st.code(tracing.render_prometheus(), language="text")
@@ -0,0 +1,48 @@
+import os
+import time
+
+# Configurable Limits
+RENDER_INTERVAL_SECONDS = float(os.getenv("STREAM_RENDER_INTERVAL", "0.1"))  # At most ~10 repaints per second
+RENDER_MAX_PENDING_CHARS = int(os.getenv("STREAM_RENDER_MAX_PENDING", "2048"))  # Repaint early after this much new text
+CURSOR = " ▌"
+
+
+def render_stream(chunks, area, on_chunk=None, interval: float = RENDER_INTERVAL_SECONDS,
+                  max_pending: int = RENDER_MAX_PENDING_CHARS) -> str:
+    """
+    Streams chunks into a Streamlit placeholder with coalesced repaints.
+
+    Each repaint re-sends the whole reply, so repainting per chunk is quadratic in
+    reply length. Here the area is only updated once `interval` seconds have passed
+    or `max_pending` characters have arrived since the last repaint.
+
+    Args:
+        chunks: Iterable of text chunks (e.g. the Groq stream).
+        area: Streamlit placeholder from st.empty().
+        on_chunk (callable): Optional hook called after every chunk, e.g. to poll other work.
+
+    Returns:
+        str: The full reply.
+    """
+    parts = []
+    pending = 0
+    last_paint = time.monotonic()
+
+    for chunk in chunks:
+        parts.append(chunk)
+        pending += len(chunk)
+
+        if on_chunk:
+            on_chunk()
+
+        now = time.monotonic()
+        if pending >= max_pending or now - last_paint >= interval:
+            text = "".join(parts)
+            parts = [text]
+            area.markdown(text + CURSOR)
+            pending = 0
+            last_paint = now
+
+    reply = "".join(parts)
+    area.markdown(reply)
+    return reply
@@ -0,0 +1,83 @@
+import os
+import streamlit as st
+
+# Configurable Limits
+TRANSCRIPT_WINDOW = int(os.getenv("TRANSCRIPT_WINDOW", "20"))      # Most recent messages always shown
+TRANSCRIPT_PAGE_SIZE = int(os.getenv("TRANSCRIPT_PAGE_SIZE", "20"))  # Older messages shown per page
+MEMORY_WINDOW = int(os.getenv("MEMORY_SIDEBAR_WINDOW", "20"))       # Chat memory entries shown in the sidebar
+ICONS = {"user": "🧑", "assistant": "🤖"}
+
+
+class Transcript:
+    """
+    The conversation shown in the chat column. Each message's markdown is built
+    once when it is added, and only a bounded slice is rendered per rerun, so a
+    rerun costs the same however long the session gets.
+    """
+
+    def __init__(self):
+        self.messages = []   # {"role", "content"}
+        self._rendered = []  # Markdown per message, same order
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, role: str, content: str) -> None:
+        self.messages.append({"role": role, "content": content})
+        self._rendered.append(f"{ICONS.get(role, '🤖')} **{role.capitalize()}:** {content}")
+
+    def clear(self) -> None:
+        self.messages = []
+        self._rendered = []
+
+    def rendered(self, start: int, stop: int) -> list:
+        """
+        Cached markdown of messages[start:stop].
+        """
+        return self._rendered[max(start, 0):max(stop, 0)]
+
+
+def get_transcript() -> Transcript:
+    if not isinstance(st.session_state.get("conversation"), Transcript):
+        st.session_state.conversation = Transcript()
+    return st.session_state.conversation
+
+
+def render_transcript(transcript: Transcript, window: int = TRANSCRIPT_WINDOW,
+                      page_size: int = TRANSCRIPT_PAGE_SIZE) -> None:
+    """
+    Renders the last `window` messages. Older messages sit behind an expander,
+    one page of `page_size` at a time, newest page first.
+    """
+    total = len(transcript)
+    older = max(total - window, 0)
+
+    if older:
+        pages = (older + page_size - 1) // page_size
+        with st.expander(f"🕘 Earlier messages ({older})"):
+            page = 1
+            if pages > 1:
+                page = st.number_input(
+                    f"Page (1 = most recent, {pages} = oldest)",
+                    min_value=1, max_value=pages, value=1, step=1, key="transcript_page",
+                )
+            stop = older - (page - 1) * page_size
+            for markdown in transcript.rendered(stop - page_size, stop):
+                st.markdown(markdown)
+
+    for markdown in transcript.rendered(older, total):
+        st.markdown(markdown)
+
+
+def render_memory(memory: list, window: int = MEMORY_WINDOW) -> None:
+    """
+    Shows the most recent chat memory entries as one numbered list. Older ones are
+    only rendered while their toggle is on.
+    """
+    memory = [" ".join(entry.split()) for entry in memory]  # One line per list item
+    shown = memory[-window:]
+    first = len(memory) - len(shown) + 1
+    if shown:
+        st.markdown("\n".join(f"{idx}. {entry}" for idx, entry in enumerate(shown, first)))
+    if first > 1 and st.toggle(f"Show {first - 1} older entries", key="memory_show_older"):
+        st.markdown("\n".join(f"{idx}. {entry}" for idx, entry in enumerate(memory[:first - 1], 1)))
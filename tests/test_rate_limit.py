@@ -0,0 +1,39 @@
+# tests/test_rate_limit.py
+
+from backend.rate_limit import TokenBucket
+
+
+def test_sync_never_raises_the_local_count():
+    bucket = TokenBucket(rate=1, capacity=10)
+    for _ in range(10):
+        assert bucket.try_acquire()
+
+    # Plenty left on the server must not hand out a fresh burst
+    bucket.sync(remaining=60, reset_in=3600)
+    assert not bucket.try_acquire()
+    assert bucket.rate == 60 / 3600
+
+
+def test_sync_with_shrinking_remaining_throttles():
+    bucket = TokenBucket(rate=1, capacity=10)
+    allowed = 0
+    for remaining in (8, 5, 2, 1):
+        bucket.sync(remaining=remaining, reset_in=3600)
+        while bucket.try_acquire():
+            allowed += 1
+    assert allowed == 8  # The first sync caps the count; later ones only pace the refill
+    assert bucket.throttled()
+    assert bucket.wait_time() > 60
+
+
+def test_sync_to_zero_blocks_until_reset():
+    bucket = TokenBucket(rate=100, capacity=10)
+    bucket.sync(remaining=0, reset_in=30)
+    assert not bucket.try_acquire()
+    assert 29 < bucket.wait_time() <= 30
+
+
+def test_refund_is_capped_at_capacity():
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.refund(5)
+    assert bucket.tokens == 2
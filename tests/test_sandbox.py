@@ -0,0 +1,29 @@
+# tests/test_sandbox.py
+
+import os
+
+from agents.sandbox import SandboxWorker
+
+# Reaches os.environ through the os module's globals, since the restricted builtins hide imports
+READ_ENVIRON = """
+for cls in ().__class__.__base__.__subclasses__():
+    if cls.__name__ == "_wrap_close":
+        print(list(cls.__init__.__globals__["environ"]))
+"""
+
+
+def test_worker_environment_has_no_api_keys(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "secret-groq")
+    monkeypatch.setenv("BLACKBOX_API_KEY", "secret-blackbox")
+    monkeypatch.setenv("GITHUB_API_KEY", "secret-github")
+
+    worker = SandboxWorker()
+    try:
+        result = worker.run(READ_ENVIRON, timeout=10)
+    finally:
+        worker.kill()
+
+    assert result["ok"], result
+    assert result["output"].strip(), "snippet did not reach os.environ"
+    assert "_API_KEY" not in result["output"]
+    assert "secret" not in result["output"]